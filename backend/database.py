@@ -1,11 +1,208 @@
 import os
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError, OperationalError, InterfaceError
 from contextlib import contextmanager
+import anyio
 
 load_dotenv()
 
+def insert_row(cursor, query, params=None, table=None):
+    """
+    Run an INSERT on an open cursor and return the generated id
+    When table is given, read the new row back by that id on the same connection
+    """
+    cursor.execute(query, params)
+    row_id = cursor.lastrowid
+    if table is None:
+        return row_id
+    cursor.execute(f"SELECT * FROM {table} WHERE id = %s", (row_id,))
+    return cursor.fetchone()
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived MySQL connections
+    - Keeps between min_size and max_size connections open
+    - Pings connections that sat idle longer than ping_interval on checkout
+    - Closes connections older than recycle seconds or idle beyond idle_timeout
+    """
+
+    def __init__(self, connect, min_size=2, max_size=10, timeout=5.0,
+                 recycle=1800, idle_timeout=300, ping_interval=30):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size, 1)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, created_at, last_used), most recently used on the right
+        self._created = {}  # id(connection) -> created_at for checked out connections
+        self._size = 0
+        self._in_use = 0
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "connects": 0,
+            "recycled": 0,
+            "broken": 0,
+            "peak_in_use": 0,
+        }
+
+    def _open(self):
+        connection = self._connect()
+        with self._cond:
+            self._metrics["connects"] += 1
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def prefill(self):
+        """Open connections until min_size is reached"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                connection = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((connection, now, now))
+                self._cond.notify()
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to timeout when the pool is exhausted"""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            self._metrics["checkouts"] += 1
+            waited = False
+            while not self._idle and self._size >= self.max_size:
+                if not waited:
+                    self._metrics["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise PoolError(
+                        f"Connection pool exhausted ({self.max_size} connections in use)"
+                    )
+                self._cond.wait(remaining)
+
+            if self._idle:
+                entry = self._idle.pop()
+            else:
+                entry = None
+                self._size += 1
+            self._in_use += 1
+            self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], self._in_use)
+
+        try:
+            if entry is None:
+                connection, created_at = self._open(), time.monotonic()
+            else:
+                connection, created_at = self._check(*entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created[id(connection)] = created_at
+        return connection
+
+    def _check(self, connection, created_at, last_used):
+        """Health-check an idle connection, replacing it when stale or broken"""
+        now = time.monotonic()
+        if now - created_at > self.recycle:
+            self._close(connection)
+            with self._cond:
+                self._metrics["recycled"] += 1
+            return self._open(), time.monotonic()
+
+        if now - last_used > self.ping_interval:
+            try:
+                connection.ping(reconnect=False)
+            except Error:
+                self._close(connection)
+                with self._cond:
+                    self._metrics["broken"] += 1
+                return self._open(), time.monotonic()
+
+        return connection, created_at
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, closing it when discarded or expired"""
+        if not discard:
+            try:
+                # Drop any open snapshot so the next borrower sees fresh data
+                if connection.in_transaction:
+                    connection.rollback()
+            except Error:
+                discard = True
+
+        now = time.monotonic()
+        to_close = []
+        with self._cond:
+            created_at = self._created.pop(id(connection), now)
+            self._in_use -= 1
+            if discard or now - created_at > self.recycle:
+                to_close.append(connection)
+                self._size -= 1
+                self._metrics["broken" if discard else "recycled"] += 1
+            else:
+                self._idle.append((connection, created_at, now))
+
+            # Trim connections that have been idle too long, oldest first
+            while (self._idle and self._size > self.min_size
+                   and now - self._idle[0][2] > self.idle_timeout):
+                to_close.append(self._idle.popleft()[0])
+                self._size -= 1
+            self._cond.notify()
+
+        for stale in to_close:
+            self._close(stale)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown)"""
+        with self._cond:
+            idle = [entry[0] for entry in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def stats(self):
+        """Return pool size and exhaustion metrics"""
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                **self._metrics,
+            }
+
 class Database:
     def __init__(self):
         self.host = os.getenv("DB_HOST", "localhost")
@@ -13,6 +210,17 @@ class Database:
         self.password = os.getenv("DB_PASSWORD", "")
         self.database = os.getenv("DB_NAME", "citizen_app_db")
         self.port = int(os.getenv("DB_PORT", 3306))
+        self.pool = ConnectionPool(
+            self.get_connection,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", 5)),
+            recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            idle_timeout=int(os.getenv("DB_POOL_IDLE_TIMEOUT", 300)),
+            ping_interval=int(os.getenv("DB_POOL_PING_INTERVAL", 30)),
+        )
+        # Callbacks registered by the transaction running on the current thread
+        self._local = threading.local()
 
     def get_connection(self):
         """Get a connection to the database"""
@@ -31,12 +239,67 @@ class Database:
 
     @contextmanager
     def get_db(self):
-        """Context manager for database connections"""
-        conn = self.get_connection()
+        """Context manager for pooled database connections"""
+        conn = self.pool.acquire()
+        discard = False
         try:
             yield conn
+        except (OperationalError, InterfaceError):
+            # Connection-level failure: don't hand this connection out again
+            discard = True
+            raise
         finally:
-            conn.close()
+            self.pool.release(conn, discard=discard)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Context manager for multi-statement workflows
+        Yields a dictionary cursor on one pooled connection and commits once at the end;
+        any exception rolls back every statement issued through the cursor
+        """
+        with self.get_db() as conn:
+            cursor = conn.cursor(dictionary=True)
+            outer_callbacks = getattr(self._local, "after_commit", None)
+            callbacks = self._local.after_commit = []
+            try:
+                yield cursor
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                if isinstance(e, Error):
+                    print(f"Transaction Error: {e}")
+                raise
+            finally:
+                self._local.after_commit = outer_callbacks
+                cursor.close()
+        # Only reached when the commit succeeded
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"after_commit callback failed: {e}")
+
+    def after_commit(self, callback):
+        """
+        Run callback() once the current transaction commits (dropped on rollback)
+        Outside a transaction it runs immediately
+        """
+        callbacks = getattr(self._local, "after_commit", None)
+        if callbacks is None:
+            callback()
+        else:
+            callbacks.append(callback)
+
+    def run_in_transaction(self, func, *args):
+        """Call func(cursor, *args) inside a single transaction and return its result"""
+        with self.transaction() as cursor:
+            return func(cursor, *args)
+
+    def insert(self, query, params=None, table=None):
+        """Insert a row and return its id, or the full row when table is given"""
+        with self.transaction() as cursor:
+            return insert_row(cursor, query, params, table)
 
     def execute_query(self, query, params=None, fetch=False):
         """Execute a query and optionally fetch results"""
@@ -77,5 +340,44 @@ class Database:
             finally:
                 cursor.close()
 
-# Initialize database instance
+class AsyncDatabase:
+    """
+    Awaitable wrapper around Database for async routes
+    - Runs each blocking MySQL call on a worker thread so the event loop stays free
+    - Caps concurrent calls at the pool size so threads never pile up waiting on the pool
+    """
+
+    def __init__(self, database, max_concurrency=None):
+        self.database = database
+        self.max_concurrency = max_concurrency or database.pool.max_size
+        self._limiter = None
+
+    def _get_limiter(self):
+        # Created lazily: a CapacityLimiter must be built inside the running event loop
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.max_concurrency)
+        return self._limiter
+
+    async def run(self, func, *args):
+        """Run a blocking database function on the bounded thread pool"""
+        return await anyio.to_thread.run_sync(func, *args, limiter=self._get_limiter())
+
+    async def execute_query(self, query, params=None, fetch=False):
+        """Execute a query without blocking the event loop"""
+        return await self.run(self.database.execute_query, query, params, fetch)
+
+    async def execute_many(self, query, data):
+        """Execute multiple queries without blocking the event loop"""
+        return await self.run(self.database.execute_many, query, data)
+
+    async def insert(self, query, params=None, table=None):
+        """Insert a row without blocking the event loop; see Database.insert"""
+        return await self.run(self.database.insert, query, params, table)
+
+    async def run_in_transaction(self, func, *args):
+        """Run func(cursor, *args) as one transaction on a worker thread"""
+        return await self.run(self.database.run_in_transaction, func, *args)
+
+# Initialize database instances
 db = Database()
+async_db = AsyncDatabase(db)
@@ -1,9 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from database import db
+from utils.geocoding import GeocodingService
+from utils.image_derivatives import DerivativeService
+from utils.image_classification import ImageClassificationService
+from utils.static_uploads import UploadFiles
+from utils.leaderboard import leaderboard
+from utils.events import broker
+import anyio
 
 # Load environment variables
 load_dotenv()
@@ -30,10 +37,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Pagination cursor for list endpoints
 )
 
 # Import routes
-from routes import reports, donations, users, auth, uploads, chatbot, admin, worker
+from routes import reports, donations, users, auth, uploads, chatbot, admin, worker, events
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -44,12 +52,75 @@ app.include_router(uploads.router, prefix="/api/uploads", tags=["File Uploads"])
 app.include_router(chatbot.router, prefix="/api/chatbot", tags=["Chatbot"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin & Departments"])
 app.include_router(worker.router, prefix="/api/worker", tags=["Worker"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
 
 
 # Serve uploaded files as static files
+# (ETag/304, immutable caching for content-addressed files, byte ranges for video)
 uploads_dir = Path("uploads")
 uploads_dir.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount("/uploads", UploadFiles(directory="uploads"), name="uploads")
+
+# Warm up the MySQL connection pool so the first requests skip the handshake
+@app.on_event("startup")
+async def open_db_pool():
+    try:
+        db.pool.prefill()
+    except Exception as e:
+        print(f"Could not prefill database pool: {e}")
+
+# Load the offline gazetteer (if configured) without blocking the event loop
+@app.on_event("startup")
+async def load_gazetteer():
+    await anyio.to_thread.run_sync(GeocodingService.load_gazetteer)
+
+# Load the chatbot knowledge base and watch its file for edits
+@app.on_event("startup")
+async def load_knowledge_base():
+    await chatbot.knowledge_base.load()
+    chatbot.knowledge_base.start_watching()
+
+# Report events are published from worker threads onto this loop
+@app.on_event("startup")
+async def start_event_broker():
+    broker.start()
+
+# Seed the in-memory leaderboard; requests load it lazily if the database isn't up yet
+@app.on_event("startup")
+async def load_leaderboard():
+    try:
+        await leaderboard.load()
+    except Exception as e:
+        print(f"Could not load leaderboard: {e}")
+
+# Load the local image classifier (if configured) and start its batch scheduler
+@app.on_event("startup")
+async def load_image_classifier():
+    await ImageClassificationService.start()
+
+@app.on_event("shutdown")
+async def close_event_streams():
+    broker.close()
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    db.pool.close_all()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await GeocodingService.close_client()
+
+@app.on_event("shutdown")
+async def stop_knowledge_base_watcher():
+    await chatbot.knowledge_base.stop_watching()
+
+@app.on_event("shutdown")
+async def stop_image_classifier():
+    await ImageClassificationService.stop()
+
+@app.on_event("shutdown")
+async def stop_derivative_workers():
+    DerivativeService.shutdown()
 
 # Root endpoint
 @app.get("/")
@@ -70,7 +141,7 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    return {"status": "healthy", "db_pool": db.pool.stats()}
 
 if __name__ == "__main__":
     import uvicorn
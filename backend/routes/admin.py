@@ -1,14 +1,48 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from schemas import (
     ReportApproval, ReportAssignWorker, ReportReject, 
-    ReportAdminResponse, WorkerResponse, WorkerStatusUpdate,
+    WorkerResponse, WorkerStatusUpdate,
     DepartmentResponse, DepartmentCreate, AdminStats, DepartmentStats
 )
-from database import db
-from typing import List
+from database import async_db
+from utils.status_counters import (
+    REPORT, WORKER, COUNTERS_QUERY, record_transition, set_worker_status, group_counters, on_transition
+)
+from utils.cache import LRUCache
+from utils.events import emit_report_event
+from utils.image_derivatives import with_derivative_urls
+from utils.async_tools import SingleFlight
+from typing import List, Optional
+import os
+from utils.pagination import (
+    MAX_PAGE_SIZE, REPORT_FIELDS, PRIORITY_RANK, PRIORITY_RANK_SQL,
+    prefixed, decode_cursor, keyset_condition, order_by, select_fields,
+    page_size, limit_clause, paginate, set_next_cursor, projected_response
+)
 
 router = APIRouter()
 
+# Report columns plus the joined names returned by the admin listings
+ADMIN_REPORT_FIELDS = {
+    **prefixed(REPORT_FIELDS, "r"),
+    "citizen_name": "u.name",
+    "citizen_email": "u.email",
+    "worker_name": "w.name",
+    "worker_status": "w.worker_status",
+    "department_name": "d.name",
+}
+
+ADMIN_REPORTS_SELECT = """
+            r.*,
+            u.name as citizen_name,
+            u.email as citizen_email,
+            w.name as worker_name,
+            w.worker_status,
+            d.name as department_name"""
+
+ADMIN_NEWEST_FIRST = [("r.created_at", "DESC"), ("r.id", "DESC")]
+ADMIN_PRIORITY_FIRST = [(PRIORITY_RANK_SQL.format(col="r.priority"), "ASC")] + ADMIN_NEWEST_FIRST
+
 # ===== DEPARTMENTS =====
 
 @router.get("/departments", response_model=List[DepartmentResponse])
@@ -16,7 +50,7 @@ async def get_departments():
     """Get all departments"""
     try:
         query = "SELECT * FROM departments WHERE status = 'active' ORDER BY name"
-        result = db.execute_query(query, fetch=True)
+        result = await async_db.execute_query(query, fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -30,35 +64,48 @@ async def create_department(department: DepartmentCreate):
             VALUES (%s, %s, %s, %s)
         """
         params = (department.name, department.description, department.icon, department.color)
-        db.execute_query(query, params)
-        
-        result = db.execute_query("SELECT * FROM departments ORDER BY id DESC LIMIT 1", fetch=True)
-        return result[0]
+        created = await async_db.insert(query, params, table="departments")
+        _invalidate_department_stats()
+        return created
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== ADMIN STATS =====
 
+def _stats_from_counters(counters):
+    reports = counters.get(REPORT, {})
+    workers = counters.get(WORKER, {})
+    return {
+        "pending_count": reports.get('pending', 0),
+        "approved_count": reports.get('approved', 0),
+        "in_progress_count": reports.get('assigned', 0) + reports.get('in-progress', 0),
+        "completed_count": reports.get('completed', 0) + reports.get('done', 0),
+        "rejected_count": reports.get('rejected', 0),
+        "available_workers": workers.get('available', 0),
+        "busy_workers": workers.get('busy', 0),
+    }
+
 @router.get("/stats", response_model=AdminStats)
 async def get_admin_stats():
     """Get admin dashboard statistics"""
     try:
-        query = "SELECT * FROM admin_stats_view"
-        result = db.execute_query(query, fetch=True)
-        return result[0] if result else {}
+        # Counters are kept up to date by every status change (schema_v5), so this is one small lookup
+        rows = await async_db.execute_query(COUNTERS_QUERY, fetch=True)
+        return _stats_from_counters(group_counters(rows))
     except Exception as e:
-        # Fallback if view doesn't exist
+        # Fallback if the counters table doesn't exist yet: one grouped scan per table
         try:
-            stats = {
-                "pending_count": db.execute_query("SELECT COUNT(*) as cnt FROM reports WHERE status = 'pending'", fetch=True)[0]['cnt'],
-                "approved_count": db.execute_query("SELECT COUNT(*) as cnt FROM reports WHERE status = 'approved'", fetch=True)[0]['cnt'],
-                "in_progress_count": db.execute_query("SELECT COUNT(*) as cnt FROM reports WHERE status IN ('assigned', 'in-progress')", fetch=True)[0]['cnt'],
-                "completed_count": db.execute_query("SELECT COUNT(*) as cnt FROM reports WHERE status IN ('completed', 'done')", fetch=True)[0]['cnt'],
-                "rejected_count": db.execute_query("SELECT COUNT(*) as cnt FROM reports WHERE status = 'rejected'", fetch=True)[0]['cnt'],
-                "available_workers": db.execute_query("SELECT COUNT(*) as cnt FROM users WHERE role = 'worker' AND worker_status = 'available'", fetch=True)[0]['cnt'],
-                "busy_workers": db.execute_query("SELECT COUNT(*) as cnt FROM users WHERE role = 'worker' AND worker_status = 'busy'", fetch=True)[0]['cnt'],
+            report_rows = await async_db.execute_query(
+                "SELECT status, COUNT(*) as cnt FROM reports GROUP BY status", fetch=True
+            )
+            worker_rows = await async_db.execute_query(
+                "SELECT worker_status, COUNT(*) as cnt FROM users WHERE role = 'worker' GROUP BY worker_status", fetch=True
+            )
+            counters = {
+                REPORT: {row['status']: row['cnt'] for row in report_rows},
+                WORKER: {row['worker_status']: row['cnt'] for row in worker_rows},
             }
-            return stats
+            return _stats_from_counters(counters)
         except Exception as e2:
             raise HTTPException(status_code=400, detail=str(e2))
 
@@ -81,47 +128,53 @@ async def get_pending_reports():
             WHERE r.status = 'pending'
             ORDER BY r.created_at DESC
         """
-        result = db.execute_query(query, fetch=True)
-        return result
+        result = await async_db.execute_query(query, fetch=True)
+        return with_derivative_urls(result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== APPROVE REPORT =====
 
+def _approve_report(cursor, report_id: int, approval: ReportApproval):
+    """Approve a pending report and log the change in one transaction"""
+    # Check if report exists and is pending (row stays locked until commit)
+    cursor.execute("SELECT * FROM reports WHERE id = %s FOR UPDATE", (report_id,))
+    report = cursor.fetchone()
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    if report['status'] != 'pending':
+        raise HTTPException(status_code=400, detail="Report is not in pending status")
+    
+    # Update report
+    query = """
+        UPDATE reports SET 
+            status = 'approved',
+            admin_approved = TRUE,
+            department_id = %s,
+            priority = %s,
+            admin_notes = %s,
+            approved_at = NOW()
+        WHERE id = %s
+    """
+    params = (approval.department_id, approval.priority, approval.admin_notes, report_id)
+    cursor.execute(query, params)
+    record_transition(cursor, REPORT, 'pending', 'approved')
+    emit_report_event(cursor, "approved", report_id)
+    
+    # Log history
+    history_query = """
+        INSERT INTO report_history (report_id, changed_by, old_status, new_status, new_department_id, action, notes)
+        VALUES (%s, %s, 'pending', 'approved', %s, 'approved', %s)
+    """
+    # TODO: Get actual admin user ID from auth
+    cursor.execute(history_query, (report_id, 1, approval.department_id, approval.admin_notes))
+
 @router.post("/reports/{report_id}/approve")
 async def approve_report(report_id: int, approval: ReportApproval):
     """Admin approves a report and assigns it to a department"""
     try:
-        # Check if report exists and is pending
-        check = db.execute_query("SELECT * FROM reports WHERE id = %s", (report_id,), fetch=True)
-        if not check:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        if check[0]['status'] != 'pending':
-            raise HTTPException(status_code=400, detail="Report is not in pending status")
-        
-        # Update report
-        query = """
-            UPDATE reports SET 
-                status = 'approved',
-                admin_approved = TRUE,
-                department_id = %s,
-                priority = %s,
-                admin_notes = %s,
-                approved_at = NOW()
-            WHERE id = %s
-        """
-        params = (approval.department_id, approval.priority, approval.admin_notes, report_id)
-        db.execute_query(query, params)
-        
-        # Log history
-        history_query = """
-            INSERT INTO report_history (report_id, changed_by, old_status, new_status, new_department_id, action, notes)
-            VALUES (%s, %s, 'pending', 'approved', %s, 'approved', %s)
-        """
-        # TODO: Get actual admin user ID from auth
-        db.execute_query(history_query, (report_id, 1, approval.department_id, approval.admin_notes))
-        
+        await async_db.run_in_transaction(_approve_report, report_id, approval)
         return {"message": "Report approved and assigned to department", "report_id": report_id}
     except HTTPException:
         raise
@@ -130,22 +183,28 @@ async def approve_report(report_id: int, approval: ReportApproval):
 
 # ===== REJECT REPORT =====
 
+def _reject_report(cursor, report_id: int, rejection: ReportReject):
+    """Reject a report in one transaction"""
+    cursor.execute("SELECT id, status FROM reports WHERE id = %s FOR UPDATE", (report_id,))
+    report = cursor.fetchone()
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    query = """
+        UPDATE reports SET 
+            status = 'rejected',
+            admin_notes = %s
+        WHERE id = %s
+    """
+    cursor.execute(query, (rejection.reason, report_id))
+    record_transition(cursor, REPORT, report['status'], 'rejected')
+    emit_report_event(cursor, "rejected", report_id)
+
 @router.post("/reports/{report_id}/reject")
 async def reject_report(report_id: int, rejection: ReportReject):
     """Admin rejects a report"""
     try:
-        check = db.execute_query("SELECT * FROM reports WHERE id = %s", (report_id,), fetch=True)
-        if not check:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        query = """
-            UPDATE reports SET 
-                status = 'rejected',
-                admin_notes = %s
-            WHERE id = %s
-        """
-        db.execute_query(query, (rejection.reason, report_id))
-        
+        await async_db.run_in_transaction(_reject_report, report_id, rejection)
         return {"message": "Report rejected", "report_id": report_id}
     except HTTPException:
         raise
@@ -155,17 +214,23 @@ async def reject_report(report_id: int, rejection: ReportReject):
 # ===== DEPARTMENT REPORTS =====
 
 @router.get("/departments/{department_id}/reports")
-async def get_department_reports(department_id: int, status: str = None):
-    """Get all reports for a specific department"""
+async def get_department_reports(
+    department_id: int,
+    response: Response,
+    status: str = None,
+    cursor: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = None
+):
+    """
+    Get reports for a specific department, most urgent first
+    Paginated with ?limit= / ?cursor= (from the X-Next-Cursor header), all rows without either;
+    optional ?fields= projection
+    """
     try:
-        query = """
-            SELECT 
-                r.*,
-                u.name as citizen_name,
-                u.email as citizen_email,
-                w.name as worker_name,
-                w.worker_status,
-                d.name as department_name
+        columns = select_fields(fields, ADMIN_REPORT_FIELDS, required=("id", "created_at", "priority"))
+        query = f"""
+            SELECT {columns or ADMIN_REPORTS_SELECT}
             FROM reports r
             JOIN users u ON r.user_id = u.id
             LEFT JOIN users w ON r.assigned_worker_id = w.id
@@ -180,10 +245,26 @@ async def get_department_reports(department_id: int, status: str = None):
         else:
             query += " AND r.status IN ('approved', 'assigned', 'in-progress')"
         
-        query += " ORDER BY CASE r.priority WHEN 'urgent' THEN 1 WHEN 'high' THEN 2 WHEN 'medium' THEN 3 ELSE 4 END, r.created_at DESC"
+        if cursor:
+            clause, values = keyset_condition(ADMIN_PRIORITY_FIRST, decode_cursor(cursor, len(ADMIN_PRIORITY_FIRST)))
+            query += f" AND {clause}"
+            params.extend(values)
         
-        result = db.execute_query(query, params, fetch=True)
-        return result
+        limit = page_size(limit, cursor)
+        query += f" ORDER BY {order_by(ADMIN_PRIORITY_FIRST)}" + limit_clause(limit, params)
+        
+        result = await async_db.execute_query(query, params, fetch=True)
+        rows, next_cursor = paginate(
+            result, limit,
+            lambda row: (PRIORITY_RANK.get(row['priority'], 4), row['created_at'], row['id'])
+        )
+        
+        if columns:
+            return projected_response(rows, next_cursor)
+        set_next_cursor(response, next_cursor)
+        return with_derivative_urls(rows)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -210,51 +291,57 @@ async def get_department_workers(department_id: int):
             GROUP BY u.id
             ORDER BY u.worker_status = 'available' DESC, u.name
         """
-        result = db.execute_query(query, (department_id,), fetch=True)
+        result = await async_db.execute_query(query, (department_id,), fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== ASSIGN WORKER TO REPORT =====
 
+def _assign_worker(cursor, report_id: int, assignment: ReportAssignWorker):
+    """Assign a worker, mark them busy and log the change in one transaction"""
+    # Check if report exists and is approved (row stays locked until commit)
+    cursor.execute("SELECT * FROM reports WHERE id = %s FOR UPDATE", (report_id,))
+    report = cursor.fetchone()
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    if report['status'] not in ['approved', 'assigned']:
+        raise HTTPException(status_code=400, detail="Report must be approved before assigning a worker")
+    
+    # Check if worker exists and is available
+    cursor.execute("SELECT * FROM users WHERE id = %s AND role = 'worker'", (assignment.worker_id,))
+    if not cursor.fetchone():
+        raise HTTPException(status_code=404, detail="Worker not found")
+    
+    # Update report
+    query = """
+        UPDATE reports SET 
+            status = 'assigned',
+            assigned_worker_id = %s,
+            department_notes = %s,
+            updated_at = NOW()
+        WHERE id = %s
+    """
+    cursor.execute(query, (assignment.worker_id, assignment.department_notes, report_id))
+    record_transition(cursor, REPORT, report['status'], 'assigned')
+    emit_report_event(cursor, "assigned", report_id)
+    
+    # Update worker status to busy
+    set_worker_status(cursor, assignment.worker_id, 'busy')
+    
+    # Log history
+    history_query = """
+        INSERT INTO report_history (report_id, changed_by, old_status, new_status, new_worker_id, action, notes)
+        VALUES (%s, %s, %s, 'assigned', %s, 'worker_assigned', %s)
+    """
+    cursor.execute(history_query, (report_id, 1, report['status'], assignment.worker_id, assignment.department_notes))
+
 @router.post("/reports/{report_id}/assign")
 async def assign_worker(report_id: int, assignment: ReportAssignWorker):
     """Department manager assigns a worker to a report"""
     try:
-        # Check if report exists and is approved
-        check = db.execute_query("SELECT * FROM reports WHERE id = %s", (report_id,), fetch=True)
-        if not check:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        if check[0]['status'] not in ['approved', 'assigned']:
-            raise HTTPException(status_code=400, detail="Report must be approved before assigning a worker")
-        
-        # Check if worker exists and is available
-        worker = db.execute_query("SELECT * FROM users WHERE id = %s AND role = 'worker'", (assignment.worker_id,), fetch=True)
-        if not worker:
-            raise HTTPException(status_code=404, detail="Worker not found")
-        
-        # Update report
-        query = """
-            UPDATE reports SET 
-                status = 'assigned',
-                assigned_worker_id = %s,
-                department_notes = %s,
-                updated_at = NOW()
-            WHERE id = %s
-        """
-        db.execute_query(query, (assignment.worker_id, assignment.department_notes, report_id))
-        
-        # Update worker status to busy
-        db.execute_query("UPDATE users SET worker_status = 'busy' WHERE id = %s", (assignment.worker_id,))
-        
-        # Log history
-        history_query = """
-            INSERT INTO report_history (report_id, changed_by, old_status, new_status, new_worker_id, action, notes)
-            VALUES (%s, %s, %s, 'assigned', %s, 'worker_assigned', %s)
-        """
-        db.execute_query(history_query, (report_id, 1, check[0]['status'], assignment.worker_id, assignment.department_notes))
-        
+        await async_db.run_in_transaction(_assign_worker, report_id, assignment)
         return {"message": "Worker assigned to report", "report_id": report_id, "worker_id": assignment.worker_id}
     except HTTPException:
         raise
@@ -267,8 +354,7 @@ async def assign_worker(report_id: int, assignment: ReportAssignWorker):
 async def update_worker_status(worker_id: int, status_update: WorkerStatusUpdate):
     """Update worker's availability status"""
     try:
-        query = "UPDATE users SET worker_status = %s WHERE id = %s AND role = 'worker'"
-        db.execute_query(query, (status_update.worker_status, worker_id))
+        await async_db.run_in_transaction(set_worker_status, worker_id, status_update.worker_status)
         return {"message": "Worker status updated", "worker_id": worker_id, "status": status_update.worker_status}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -296,7 +382,7 @@ async def get_all_workers():
             GROUP BY u.id
             ORDER BY d.name, u.name
         """
-        result = db.execute_query(query, fetch=True)
+        result = await async_db.execute_query(query, fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -304,17 +390,23 @@ async def get_all_workers():
 # ===== GET ALL REPORTS FOR ADMIN =====
 
 @router.get("/reports")
-async def get_all_reports(status: str = None, department_id: int = None):
-    """Get all reports with full details for admin view"""
+async def get_all_reports(
+    response: Response,
+    status: str = None,
+    department_id: int = None,
+    cursor: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = None
+):
+    """
+    Get reports with full details for admin view, newest first
+    Paginated with ?limit= / ?cursor= (from the X-Next-Cursor header), all rows without either;
+    optional ?fields= projection
+    """
     try:
-        query = """
-            SELECT 
-                r.*,
-                u.name as citizen_name,
-                u.email as citizen_email,
-                w.name as worker_name,
-                w.worker_status,
-                d.name as department_name
+        columns = select_fields(fields, ADMIN_REPORT_FIELDS)
+        query = f"""
+            SELECT {columns or ADMIN_REPORTS_SELECT}
             FROM reports r
             JOIN users u ON r.user_id = u.id
             LEFT JOIN users w ON r.assigned_worker_id = w.id
@@ -331,10 +423,23 @@ async def get_all_reports(status: str = None, department_id: int = None):
             query += " AND r.department_id = %s"
             params.append(department_id)
         
-        query += " ORDER BY r.created_at DESC"
+        if cursor:
+            clause, values = keyset_condition(ADMIN_NEWEST_FIRST, decode_cursor(cursor, len(ADMIN_NEWEST_FIRST)))
+            query += f" AND {clause}"
+            params.extend(values)
         
-        result = db.execute_query(query, params if params else None, fetch=True)
-        return result
+        limit = page_size(limit, cursor)
+        query += f" ORDER BY {order_by(ADMIN_NEWEST_FIRST)}" + limit_clause(limit, params)
+        
+        result = await async_db.execute_query(query, params, fetch=True)
+        rows, next_cursor = paginate(result, limit, lambda row: (row['created_at'], row['id']))
+        
+        if columns:
+            return projected_response(rows, next_cursor)
+        set_next_cursor(response, next_cursor)
+        return with_derivative_urls(rows)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -351,11 +456,11 @@ async def suggest_department(category: str):
             WHERE LOWER(cdm.category) LIKE LOWER(%s)
             LIMIT 1
         """
-        result = db.execute_query(query, (f"%{category}%",), fetch=True)
+        result = await async_db.execute_query(query, (f"%{category}%",), fetch=True)
         
         if not result:
             # Return "Other" department as default
-            result = db.execute_query("SELECT id, name, icon, color FROM departments WHERE name = 'Other'", fetch=True)
+            result = await async_db.execute_query("SELECT id, name, icon, color FROM departments WHERE name = 'Other'", fetch=True)
         
         return result[0] if result else {"id": None, "name": "Unknown", "icon": "help-circle", "color": "#6B7280"}
     except Exception as e:
@@ -363,42 +468,99 @@ async def suggest_department(category: str):
 
 # ===== DEPARTMENT STATS =====
 
+# Stats for every department are computed together and cached briefly;
+# any committed report/worker status change drops the cached copy
+DEPARTMENT_STATS_TTL = float(os.getenv("DEPARTMENT_STATS_TTL", 15))
+_department_stats_cache = LRUCache(maxsize=1, ttl=DEPARTMENT_STATS_TTL)
+_department_stats_flight = SingleFlight()
+_department_stats_generation = [0]
+
+def _invalidate_department_stats(entity=None, old_status=None, new_status=None):
+    _department_stats_generation[0] += 1
+    _department_stats_cache.clear()
+
+on_transition(_invalidate_department_stats)
+
+def _load_department_stats(cursor):
+    """Stats for all departments from two grouped passes (one connection, one snapshot)"""
+    cursor.execute("SELECT id, name, status FROM departments ORDER BY name")
+    departments = cursor.fetchall()
+    stats = {
+        dept['id']: {
+            "department_id": dept['id'],
+            "department_name": dept['name'],
+            "pending_count": 0,
+            "assigned_count": 0,
+            "in_progress_count": 0,
+            "completed_count": 0,
+            "total_workers": 0,
+            "available_workers": 0,
+        }
+        for dept in departments
+    }
+    status_fields = {
+        'approved': "pending_count",
+        'assigned': "assigned_count",
+        'in-progress': "in_progress_count",
+        'completed': "completed_count",
+        'done': "completed_count",
+    }
+    
+    cursor.execute("""
+        SELECT department_id, status, COUNT(*) as cnt
+        FROM reports
+        WHERE department_id IS NOT NULL
+        GROUP BY department_id, status
+    """)
+    for row in cursor.fetchall():
+        field = status_fields.get(row['status'])
+        if field and row['department_id'] in stats:
+            stats[row['department_id']][field] += row['cnt']
+    
+    cursor.execute("""
+        SELECT department_id, COUNT(*) as total, SUM(worker_status = 'available') as available
+        FROM users
+        WHERE role = 'worker' AND department_id IS NOT NULL
+        GROUP BY department_id
+    """)
+    for row in cursor.fetchall():
+        if row['department_id'] in stats:
+            stats[row['department_id']]["total_workers"] = row['total']
+            stats[row['department_id']]["available_workers"] = int(row['available'] or 0)
+    
+    active = [dept['id'] for dept in departments if dept['status'] == 'active']
+    return {"by_id": stats, "active": active}
+
+async def _fetch_department_stats():
+    generation = _department_stats_generation[0]
+    result = await async_db.run_in_transaction(_load_department_stats)
+    # Don't cache a result that a transition committed during the load may have outdated
+    if generation == _department_stats_generation[0]:
+        _department_stats_cache.set("all", result)
+    return result
+
+async def _all_department_stats():
+    cached = _department_stats_cache.get("all")
+    if cached is not None:
+        return cached
+    return await _department_stats_flight.do("all", _fetch_department_stats)
+
+@router.get("/departments/stats", response_model=List[DepartmentStats])
+async def get_all_department_stats():
+    """Get statistics for every active department in one call"""
+    try:
+        result = await _all_department_stats()
+        return [result["by_id"][dept_id] for dept_id in result["active"]]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/departments/{department_id}/stats")
 async def get_department_stats(department_id: int):
     """Get statistics for a specific department"""
     try:
-        dept = db.execute_query("SELECT * FROM departments WHERE id = %s", (department_id,), fetch=True)
-        if not dept:
+        stats = (await _all_department_stats())["by_id"].get(department_id)
+        if stats is None:
             raise HTTPException(status_code=404, detail="Department not found")
-        
-        stats = {
-            "department_id": department_id,
-            "department_name": dept[0]['name'],
-            "pending_count": db.execute_query(
-                "SELECT COUNT(*) as cnt FROM reports WHERE department_id = %s AND status = 'approved'", 
-                (department_id,), fetch=True
-            )[0]['cnt'],
-            "assigned_count": db.execute_query(
-                "SELECT COUNT(*) as cnt FROM reports WHERE department_id = %s AND status = 'assigned'", 
-                (department_id,), fetch=True
-            )[0]['cnt'],
-            "in_progress_count": db.execute_query(
-                "SELECT COUNT(*) as cnt FROM reports WHERE department_id = %s AND status = 'in-progress'", 
-                (department_id,), fetch=True
-            )[0]['cnt'],
-            "completed_count": db.execute_query(
-                "SELECT COUNT(*) as cnt FROM reports WHERE department_id = %s AND status IN ('completed', 'done')", 
-                (department_id,), fetch=True
-            )[0]['cnt'],
-            "total_workers": db.execute_query(
-                "SELECT COUNT(*) as cnt FROM users WHERE department_id = %s AND role = 'worker'", 
-                (department_id,), fetch=True
-            )[0]['cnt'],
-            "available_workers": db.execute_query(
-                "SELECT COUNT(*) as cnt FROM users WHERE department_id = %s AND role = 'worker' AND worker_status = 'available'", 
-                (department_id,), fetch=True
-            )[0]['cnt'],
-        }
         return stats
     except HTTPException:
         raise
@@ -420,7 +582,7 @@ async def get_report_history(report_id: int):
             WHERE rh.report_id = %s
             ORDER BY rh.created_at DESC
         """
-        result = db.execute_query(query, (report_id,), fetch=True)
+        result = await async_db.execute_query(query, (report_id,), fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,16 +1,25 @@
 from fastapi import APIRouter, HTTPException
 from schemas import LoginRequest, AuthResponse, UserCreate
-from database import db
+from database import async_db, db, insert_row
+from utils.leaderboard import leaderboard
+from utils.status_counters import WORKER, record_transition
 
 router = APIRouter()
 
+def _insert_user(cursor, query, params):
+    created = insert_row(cursor, query, params, table="users")
+    if created.get('role') == 'worker':
+        record_transition(cursor, WORKER, None, created.get('worker_status'))
+    db.after_commit(lambda: leaderboard.update(created))
+    return created
+
 # ===== LOGIN =====
 @router.post("/login")
 async def login(request: LoginRequest):
     """Login user"""
     try:
         query = "SELECT * FROM users WHERE email = %s"
-        result = db.execute_query(query, (request.email,), fetch=True)
+        result = await async_db.execute_query(query, (request.email,), fetch=True)
         
         if not result:
             raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -35,7 +44,7 @@ async def register(user: UserCreate):
     try:
         # Check if user exists
         check_query = "SELECT id FROM users WHERE email = %s"
-        existing = db.execute_query(check_query, (user.email,), fetch=True)
+        existing = await async_db.execute_query(check_query, (user.email,), fetch=True)
         
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
@@ -48,15 +57,13 @@ async def register(user: UserCreate):
         """
         params = (user.email, user.name, user.phone, user.role)
         
-        db.execute_query(query, params)
-        
-        # Get created user
-        result = db.execute_query("SELECT * FROM users WHERE email = %s", (user.email,), fetch=True)
+        # Insert and read back the created user by its generated id
+        created = await async_db.run_in_transaction(_insert_user, query, params)
         
         return {
             "access_token": "dummy_token",
             "token_type": "bearer",
-            "user": result[0] if result else None
+            "user": created
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,7 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from schemas import DonationCreate, DonationUpdate, DonationResponse
-from database import db
-from typing import List
+from database import async_db
+from typing import List, Optional
+from utils.blob_store import insert_with_refs, delete_with_refs
+from utils.pagination import (
+    MAX_PAGE_SIZE, NEWEST_FIRST, DONATION_FIELDS,
+    decode_cursor, keyset_condition, order_by, select_fields,
+    page_size, limit_clause, paginate, set_next_cursor, projected_response
+)
 
 router = APIRouter()
 
@@ -29,22 +35,33 @@ async def create_donation(donation: DonationCreate):
             donation.country
         )
         
-        db.execute_query(query, params)
-        
-        # Get the created donation
-        select_query = "SELECT * FROM donations ORDER BY id DESC LIMIT 1"
-        result = db.execute_query(select_query, fetch=True)
-        
-        return result[0] if result else None
+        # Insert, read back the new row by its generated id and count its image reference
+        return await async_db.run_in_transaction(
+            insert_with_refs, query, params, "donations", (donation.image_url,)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== GET ALL DONATIONS =====
 @router.get("/", response_model=List[DonationResponse])
-async def get_donations(status: str = "available", category: str = None):
-    """Get all donations with optional filtering"""
+async def get_donations(
+    response: Response,
+    status: str = "available",
+    category: str = None,
+    cursor: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = None
+):
+    """
+    Get donations with optional filtering, newest first
+    Paginated with ?limit= / ?cursor= (from the X-Next-Cursor header), all rows without either;
+    optional ?fields= projection
+    """
     try:
-        query = "SELECT * FROM donations WHERE 1=1"
+        columns = select_fields(fields, DONATION_FIELDS)
+        query = f"SELECT {columns or '*'} FROM donations WHERE 1=1"
         params = []
         
         if status:
@@ -55,10 +72,23 @@ async def get_donations(status: str = "available", category: str = None):
             query += " AND category = %s"
             params.append(category)
         
-        query += " ORDER BY created_at DESC"
+        if cursor:
+            clause, values = keyset_condition(NEWEST_FIRST, decode_cursor(cursor, len(NEWEST_FIRST)))
+            query += f" AND {clause}"
+            params.extend(values)
         
-        result = db.execute_query(query, params if params else None, fetch=True)
-        return result
+        limit = page_size(limit, cursor)
+        query += f" ORDER BY {order_by(NEWEST_FIRST)}" + limit_clause(limit, params)
+        
+        result = await async_db.execute_query(query, params, fetch=True)
+        rows, next_cursor = paginate(result, limit, lambda row: (row['created_at'], row['id']))
+        
+        if columns:
+            return projected_response(rows, next_cursor)
+        set_next_cursor(response, next_cursor)
+        return rows
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -68,7 +98,7 @@ async def get_donation(donation_id: int):
     """Get a specific donation"""
     try:
         query = "SELECT * FROM donations WHERE id = %s"
-        result = db.execute_query(query, (donation_id,), fetch=True)
+        result = await async_db.execute_query(query, (donation_id,), fetch=True)
         
         if not result:
             raise HTTPException(status_code=404, detail="Donation not found")
@@ -83,7 +113,7 @@ async def update_donation(donation_id: int, donation: DonationUpdate):
     """Update a donation"""
     try:
         query = "SELECT * FROM donations WHERE id = %s"
-        existing = db.execute_query(query, (donation_id,), fetch=True)
+        existing = await async_db.execute_query(query, (donation_id,), fetch=True)
         
         if not existing:
             raise HTTPException(status_code=404, detail="Donation not found")
@@ -107,10 +137,10 @@ async def update_donation(donation_id: int, donation: DonationUpdate):
             update_query += " WHERE id = %s"
             params.append(donation_id)
             
-            db.execute_query(update_query, params)
+            await async_db.execute_query(update_query, params)
         
         # Return updated donation
-        result = db.execute_query("SELECT * FROM donations WHERE id = %s", (donation_id,), fetch=True)
+        result = await async_db.execute_query("SELECT * FROM donations WHERE id = %s", (donation_id,), fetch=True)
         return result[0] if result else None
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -120,20 +150,39 @@ async def update_donation(donation_id: int, donation: DonationUpdate):
 async def delete_donation(donation_id: int):
     """Delete a donation"""
     try:
-        query = "DELETE FROM donations WHERE id = %s"
-        db.execute_query(query, (donation_id,))
+        # Releases the donation's image so orphaned uploads can be collected
+        await async_db.run_in_transaction(delete_with_refs, "donations", donation_id, ("image_url",))
         return {"message": "Donation deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== GET DONATIONS BY CATEGORY =====
 @router.get("/category/{category}", response_model=List[DonationResponse])
-async def get_donations_by_category(category: str):
-    """Get all available donations in a category"""
+async def get_donations_by_category(
+    category: str,
+    response: Response,
+    cursor: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Get available donations in a category, paginated with ?limit= / ?cursor= (all rows without either)"""
     try:
-        query = "SELECT * FROM donations WHERE category = %s AND status = 'available' ORDER BY created_at DESC"
-        result = db.execute_query(query, (category,), fetch=True)
-        return result
+        query = "SELECT * FROM donations WHERE category = %s AND status = 'available'"
+        params = [category]
+        
+        if cursor:
+            clause, values = keyset_condition(NEWEST_FIRST, decode_cursor(cursor, len(NEWEST_FIRST)))
+            query += f" AND {clause}"
+            params.extend(values)
+        
+        limit = page_size(limit, cursor)
+        query += f" ORDER BY {order_by(NEWEST_FIRST)}" + limit_clause(limit, params)
+        
+        result = await async_db.execute_query(query, params, fetch=True)
+        rows, next_cursor = paginate(result, limit, lambda row: (row['created_at'], row['id']))
+        set_next_cursor(response, next_cursor)
+        return rows
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -143,7 +192,7 @@ async def get_available_donations():
     """Get all available donations from view"""
     try:
         query = "SELECT * FROM available_donations"
-        result = db.execute_query(query, fetch=True)
+        result = await async_db.execute_query(query, fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from utils.events import broker
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 3000
+
+def _format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+# ===== REPORT EVENT STREAM =====
+@router.get("/reports")
+async def report_events(
+    request: Request,
+    department_id: Optional[int] = None,
+    worker_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    last_event_id: Optional[int] = Query(None, description="Resume after this event id (if the client can't send the header)"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Server-Sent Events stream of report lifecycle events
+    Event types: created, approved, rejected, assigned, started, completed, updated, deleted
+    Filter by department_id, worker_id and/or user_id (all given filters must match).
+    A "reset" event means events were missed; refetch the list once and keep listening.
+    """
+    filters = {
+        name: value for name, value in
+        (("department_id", department_id), ("worker_id", worker_id), ("user_id", user_id))
+        if value is not None
+    }
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    subscription = broker.subscribe(filters, last_event_id)
+    
+    async def stream():
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield _format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stats")
+async def event_stats():
+    """Subscriber and delivery counters for the event stream"""
+    return broker.stats()
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from schemas import ReportCreate, ReportUpdate, ReportResponse
-from database import db
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query, Response
+from schemas import ReportCreate, ReportUpdate, ReportResponse, ReportNearbyResponse
+from database import async_db
+from typing import List, Dict, Optional
 from utils.geocoding import GeocodingService
 from utils.image_classification import ImageClassificationService
+from utils.micro_batcher import QueueFullError
+from utils import geohash
+from utils.blob_store import insert_with_refs, delete_with_refs
+from utils.status_counters import REPORT, record_transition
+from utils.leaderboard import leaderboard
+from utils.events import REPORT_EVENT_COLUMNS, emit_report_event
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEWEST_FIRST, REPORT_FIELDS,
+    decode_cursor, keyset_condition, order_by, select_fields,
+    page_size, limit_clause, paginate, set_next_cursor, projected_response
+)
 
 router = APIRouter()
 
+NEAREST_FIRST = [("distance_m", "ASC"), ("id", "ASC")]
+
+# Statuses that no longer need field attention
+CLOSED_STATUSES = ('completed', 'done', 'rejected')
+
 # ===== GEOCODING ENDPOINT =====
 @router.post("/geocode")
 async def reverse_geocode(data: Dict):
@@ -41,12 +57,22 @@ async def reverse_geocode(data: Dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Geocoding failed: {str(e)}")
 
+@router.get("/geocode/stats")
+async def geocode_cache_stats():
+    """Reverse-geocoding cache hit/miss counters"""
+    return GeocodingService.cache_stats()
+
+@router.get("/classify-image/stats")
+async def classifier_stats():
+    """Image classifier status and average inference time"""
+    return ImageClassificationService.stats()
+
 # ===== IMAGE CLASSIFICATION ENDPOINT =====
 @router.post("/classify-image")
 async def classify_image(file: UploadFile = File(...)):
     """
     Classify civic problem from uploaded image
-    Uses free Hugging Face API - no billing required
+    Runs a local ONNX model on the CPU - no external API or billing
     Returns category suggestion with confidence score
     """
     try:
@@ -56,8 +82,15 @@ async def classify_image(file: UploadFile = File(...)):
         if len(image_bytes) == 0:
             raise HTTPException(status_code=400, detail="Empty file")
         
-        # Classify image
-        result = await ImageClassificationService.classify_image(image_bytes)
+        # Classify image (batched with concurrent requests)
+        try:
+            result = await ImageClassificationService.classify_image(image_bytes)
+        except QueueFullError:
+            raise HTTPException(
+                status_code=503,
+                detail="Image classifier is busy, please retry shortly",
+                headers={"Retry-After": "1"}
+            )
         
         return {
             "success": True,
@@ -70,6 +103,13 @@ async def classify_image(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
 # ===== CREATE REPORT =====
+def _insert_report(cursor, query, params, media_urls):
+    """Insert a report, count its media references and its status in one transaction"""
+    created = insert_with_refs(cursor, query, params, "reports", media_urls)
+    record_transition(cursor, REPORT, None, created['status'])
+    emit_report_event(cursor, "created", created['id'], created)
+    return created
+
 @router.post("/", response_model=ReportResponse)
 async def create_report(report: ReportCreate):
     """Create a new report"""
@@ -83,17 +123,22 @@ async def create_report(report: ReportCreate):
                 WHERE LOWER(cdm.category) LIKE LOWER(%s)
                 LIMIT 1
             """
-            dept_result = db.execute_query(dept_query, (f"%{report.category}%",), fetch=True)
+            dept_result = await async_db.execute_query(dept_query, (f"%{report.category}%",), fetch=True)
             if dept_result:
                 suggested_dept_id = dept_result[0]['id']
         except:
             pass  # Ignore if category mapping doesn't exist
         
+        # Geohash makes the report findable by the nearby/viewport searches
+        location_hash = None
+        if report.latitude is not None and report.longitude is not None:
+            location_hash = geohash.encode(report.latitude, report.longitude)
+        
         query = """
             INSERT INTO reports 
             (user_id, category, description, location_text, city, state, country, 
-             latitude, longitude, image_url, video_url, points, status, suggested_department_id)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+             latitude, longitude, geohash, image_url, video_url, points, status, suggested_department_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         params = (
             1,  # TODO: Get from auth token
@@ -105,6 +150,7 @@ async def create_report(report: ReportCreate):
             report.country,
             report.latitude,
             report.longitude,
+            location_hash,
             report.image_url,
             report.video_url,
             3,  # Default 3 points
@@ -112,22 +158,34 @@ async def create_report(report: ReportCreate):
             suggested_dept_id
         )
         
-        db.execute_query(query, params)
-        
-        # Get the created report
-        select_query = "SELECT * FROM reports ORDER BY id DESC LIMIT 1"
-        result = db.execute_query(select_query, fetch=True)
-        
-        return result[0] if result else None
+        # Insert, read back the new row by its generated id and count its media references
+        return await async_db.run_in_transaction(
+            _insert_report, query, params, (report.image_url, report.video_url)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== GET ALL REPORTS =====
 @router.get("/", response_model=List[ReportResponse])
-async def get_reports(status: str = None, category: str = None):
-    """Get all reports with optional filtering"""
+async def get_reports(
+    response: Response,
+    status: str = None,
+    category: str = None,
+    cursor: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = None
+):
+    """
+    Get reports with optional filtering, newest first
+    Paginated once ?limit= or ?cursor= is sent (all rows without either):
+    send the X-Next-Cursor response header back as ?cursor= for the next page
+    Optional ?fields=id,status,... returns only the listed columns
+    """
     try:
-        query = "SELECT * FROM reports WHERE 1=1"
+        columns = select_fields(fields, REPORT_FIELDS)
+        query = f"SELECT {columns or '*'} FROM reports WHERE 1=1"
         params = []
         
         if status:
@@ -138,10 +196,131 @@ async def get_reports(status: str = None, category: str = None):
             query += " AND category = %s"
             params.append(category)
         
-        query += " ORDER BY created_at DESC"
+        if cursor:
+            clause, values = keyset_condition(NEWEST_FIRST, decode_cursor(cursor, len(NEWEST_FIRST)))
+            query += f" AND {clause}"
+            params.extend(values)
         
-        result = db.execute_query(query, params if params else None, fetch=True)
-        return result
+        limit = page_size(limit, cursor)
+        query += f" ORDER BY {order_by(NEWEST_FIRST)}" + limit_clause(limit, params)
+        
+        result = await async_db.execute_query(query, params, fetch=True)
+        rows, next_cursor = paginate(result, limit, lambda row: (row['created_at'], row['id']))
+        
+        if columns:
+            return projected_response(rows, next_cursor)
+        set_next_cursor(response, next_cursor)
+        return rows
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# ===== SPATIAL SEARCH =====
+async def _spatial_search(bbox, center, radius_m, status, include_closed, cursor, limit):
+    """
+    Find reports inside a bounding box, nearest to center first
+    The geohash prefixes covering the box narrow the scan to a few index ranges;
+    exact box / radius filtering and distance ordering happen on that small candidate set
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    prefixes = geohash.cover(min_lat, min_lon, max_lat, max_lon)
+    
+    query = f"""
+        SELECT *, {geohash.haversine_sql()} AS distance_m
+        FROM reports
+        WHERE ({" OR ".join(["geohash LIKE %s"] * len(prefixes))})
+          AND latitude BETWEEN %s AND %s
+          AND longitude BETWEEN %s AND %s
+    """
+    params = [center[0], center[0], center[1]]
+    params.extend(f"{prefix}%" for prefix in prefixes)
+    params.extend([min_lat, max_lat, min_lon, max_lon])
+    
+    if status:
+        query += " AND status = %s"
+        params.append(status)
+    elif not include_closed:
+        query += f" AND status NOT IN ({', '.join(['%s'] * len(CLOSED_STATUSES))})"
+        params.extend(CLOSED_STATUSES)
+    
+    having = []
+    if radius_m is not None:
+        having.append("distance_m <= %s")
+        params.append(radius_m)
+    if cursor:
+        clause, values = keyset_condition(NEAREST_FIRST, decode_cursor(cursor, len(NEAREST_FIRST)))
+        having.append(clause)
+        params.extend(values)
+    if having:
+        query += " HAVING " + " AND ".join(having)
+    
+    query += f" ORDER BY {order_by(NEAREST_FIRST)} LIMIT %s"
+    params.append(limit + 1)
+    
+    result = await async_db.execute_query(query, params, fetch=True)
+    return paginate(result, limit, lambda row: (row['distance_m'], row['id']))
+
+@router.get("/nearby", response_model=List[ReportNearbyResponse])
+async def get_nearby_reports(
+    response: Response,
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(2000, gt=0, le=50000),
+    status: str = None,
+    include_closed: bool = False,
+    cursor: str = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Get reports within radius_m meters of a point, nearest first
+    Open reports only unless status or include_closed is given; paginated with ?cursor=
+    """
+    try:
+        bbox = geohash.radius_bbox(latitude, longitude, radius_m)
+        rows, next_cursor = await _spatial_search(
+            bbox, (latitude, longitude), radius_m, status, include_closed, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
+        return rows
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/within", response_model=List[ReportNearbyResponse])
+async def get_reports_in_viewport(
+    response: Response,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    latitude: float = Query(None, ge=-90, le=90),
+    longitude: float = Query(None, ge=-180, le=180),
+    status: str = None,
+    include_closed: bool = False,
+    cursor: str = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Get reports inside a map viewport, nearest to (latitude, longitude) first
+    Distance is measured from the viewport center when no point is given
+    """
+    try:
+        if min_lat > max_lat or min_lon > max_lon:
+            raise HTTPException(status_code=400, detail="Invalid bounding box")
+        
+        center = (
+            latitude if latitude is not None else (min_lat + max_lat) / 2,
+            longitude if longitude is not None else (min_lon + max_lon) / 2,
+        )
+        rows, next_cursor = await _spatial_search(
+            (min_lat, min_lon, max_lat, max_lon), center, None, status, include_closed, cursor, limit
+        )
+        set_next_cursor(response, next_cursor)
+        return rows
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -151,7 +330,7 @@ async def get_report(report_id: int):
     """Get a specific report"""
     try:
         query = "SELECT * FROM reports WHERE id = %s"
-        result = db.execute_query(query, (report_id,), fetch=True)
+        result = await async_db.execute_query(query, (report_id,), fetch=True)
         
         if not result:
             raise HTTPException(status_code=404, detail="Report not found")
@@ -161,53 +340,73 @@ async def get_report(report_id: int):
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== UPDATE REPORT =====
+def _update_report(cursor, report_id: int, report: ReportUpdate):
+    """Apply a report update and keep the status counters in step in one transaction"""
+    cursor.execute("SELECT status FROM reports WHERE id = %s FOR UPDATE", (report_id,))
+    existing = cursor.fetchone()
+    if not existing:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    update_query = "UPDATE reports SET"
+    params = []
+    updates = []
+    
+    if report.status:
+        updates.append(" status = %s")
+        params.append(report.status)
+    
+    if report.assigned_worker_id:
+        updates.append(" assigned_worker_id = %s")
+        params.append(report.assigned_worker_id)
+    
+    if report.bonus_points is not None:
+        updates.append(" bonus_points = %s")
+        params.append(report.bonus_points)
+    
+    if updates:
+        updates.append(" updated_at = NOW()")
+        update_query += "," .join(updates)
+        update_query += " WHERE id = %s"
+        params.append(report_id)
+        
+        cursor.execute(update_query, params)
+        if report.status:
+            record_transition(cursor, REPORT, existing['status'], report.status)
+    
+    # Return updated report
+    cursor.execute("SELECT * FROM reports WHERE id = %s", (report_id,))
+    updated = cursor.fetchone()
+    if updates:
+        emit_report_event(cursor, "updated", report_id, updated)
+    return updated
+
 @router.put("/{report_id}", response_model=ReportResponse)
 async def update_report(report_id: int, report: ReportUpdate):
     """Update a report"""
     try:
-        query = "SELECT * FROM reports WHERE id = %s"
-        existing = db.execute_query(query, (report_id,), fetch=True)
-        
-        if not existing:
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        update_query = "UPDATE reports SET"
-        params = []
-        updates = []
-        
-        if report.status:
-            updates.append(" status = %s")
-            params.append(report.status)
-        
-        if report.assigned_worker_id:
-            updates.append(" assigned_worker_id = %s")
-            params.append(report.assigned_worker_id)
-        
-        if report.bonus_points is not None:
-            updates.append(" bonus_points = %s")
-            params.append(report.bonus_points)
-        
-        if updates:
-            updates.append(" updated_at = NOW()")
-            update_query += "," .join(updates)
-            update_query += " WHERE id = %s"
-            params.append(report_id)
-            
-            db.execute_query(update_query, params)
-        
-        # Return updated report
-        result = db.execute_query("SELECT * FROM reports WHERE id = %s", (report_id,), fetch=True)
-        return result[0] if result else None
+        return await async_db.run_in_transaction(_update_report, report_id, report)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== DELETE REPORT =====
+def _delete_report(cursor, report_id: int):
+    """Delete a report, release its media and drop it from the status counters"""
+    cursor.execute(f"SELECT {REPORT_EVENT_COLUMNS} FROM reports WHERE id = %s FOR UPDATE", (report_id,))
+    existing = cursor.fetchone()
+    if not existing:
+        return
+    # Releases the report's photo/video so orphaned uploads can be collected
+    delete_with_refs(cursor, "reports", report_id, ("image_url", "video_url"))
+    record_transition(cursor, REPORT, existing['status'], None)
+    emit_report_event(cursor, "deleted", report_id, existing)
+
 @router.delete("/{report_id}")
 async def delete_report(report_id: int):
     """Delete a report"""
     try:
-        query = "DELETE FROM reports WHERE id = %s"
-        db.execute_query(query, (report_id,))
+        await async_db.run_in_transaction(_delete_report, report_id)
         return {"message": "Report deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -218,7 +417,7 @@ async def get_reports_by_city(city: str):
     """Get all reports for a specific city"""
     try:
         query = "SELECT * FROM reports WHERE city = %s AND status != 'done' ORDER BY created_at DESC"
-        result = db.execute_query(query, (city,), fetch=True)
+        result = await async_db.execute_query(query, (city,), fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -228,8 +427,7 @@ async def get_reports_by_city(city: str):
 async def get_leaderboard():
     """Get leaderboard"""
     try:
-        query = "SELECT * FROM leaderboard LIMIT 50"
-        result = db.execute_query(query, fetch=True)
-        return result
+        await leaderboard.ensure_loaded()
+        return leaderboard.top(50)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
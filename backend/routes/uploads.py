@@ -1,7 +1,16 @@
 import os
-from fastapi import APIRouter, File, UploadFile, HTTPException
+import hashlib
+import anyio
+from fastapi import APIRouter, HTTPException, Request, Query
 from pathlib import Path
 from datetime import datetime
+from database import async_db
+from utils.upload_stream import stream_file_field
+from utils.image_derivatives import DerivativeService
+from utils.blob_store import (
+    BlobStore, normalize_extension, is_digest,
+    register_blob, find_orphans, forget_blob
+)
 
 router = APIRouter()
 
@@ -9,41 +18,80 @@ router = APIRouter()
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+# Uploads are stored once per content hash under uploads/ab/cd/<sha256>.<ext>
+blob_store = BlobStore(UPLOAD_DIR)
+
+# Limit file size to 50MB
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+# Allowance for multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# The body is parsed by hand, so describe the form for the API docs
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+@router.post("/upload", openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_file(request: Request):
     """
     Upload a file (image or video) for reports/donations
     Bypasses Firebase Storage CORS issues
+    Streams to disk in chunks; oversized uploads are rejected before they are fully received
     """
     try:
+        # Reject oversized requests up front when the client declares the length
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD:
+            raise HTTPException(status_code=413, detail="File too large (max 50MB)")
+        
+        # Hash while streaming so duplicates are found without re-reading the file
+        hasher = hashlib.sha256()
+        upload = await stream_file_field(request, "file", UPLOAD_DIR, MAX_UPLOAD_SIZE, on_chunk=hasher.update)
+        
         # Validate file
-        if not file.filename:
+        filename = os.path.basename(upload.filename)
+        if not filename:
+            upload.discard()
             raise HTTPException(status_code=400, detail="No filename provided")
         
-        # Limit file size to 50MB
-        contents = await file.read()
-        if len(contents) > 50 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="File too large (max 50MB)")
+        # Register the blob before looking for a stored copy: this waits for a GC run that
+        # is removing the same digest, and the fresh row keeps later GC runs away from it
+        digest = hasher.hexdigest()
+        ext = normalize_extension(filename)
+        try:
+            await async_db.run_in_transaction(register_blob, digest, blob_store.url_for(digest, ext), upload.size)
+        except Exception as e:
+            upload.discard()
+            raise HTTPException(status_code=500, detail=f"Could not register upload: {str(e)}")
         
-        # Generate unique filename
-        timestamp = int(datetime.now().timestamp() * 1000)
-        file_ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{timestamp}_{file.filename}"
+        # Move the finished temp file into place atomically (or drop it if already stored)
+        file_path, deduplicated = await anyio.to_thread.run_sync(
+            blob_store.commit, upload.temp_path, digest, ext
+        )
+        file_url = blob_store.url_for_path(file_path)
         
-        # Save file
-        file_path = UPLOAD_DIR / unique_filename
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        
-        # Return file URL
-        file_url = f"/uploads/{unique_filename}"
+        # Thumbnails and WebP/AVIF copies are made in the background (skips ones that exist)
+        DerivativeService.schedule(file_path)
         
         return {
             "success": True,
-            "filename": unique_filename,
+            "filename": file_path.name,
             "url": file_url,
-            "size": len(contents),
-            "timestamp": timestamp
+            "size": upload.size,
+            "sha256": digest,
+            "deduplicated": deduplicated,
+            "timestamp": int(datetime.now().timestamp() * 1000)
         }
     
     except HTTPException as e:
@@ -51,11 +99,58 @@ async def upload_file(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@router.get("/blobs/{sha256}")
+async def find_blob(sha256: str):
+    """
+    Look up an upload by its SHA-256
+    Clients can hash a file locally and skip re-uploading it when it already exists
+    """
+    digest = sha256.lower()
+    if not is_digest(digest):
+        raise HTTPException(status_code=400, detail="Expected a hex SHA-256 digest")
+    
+    path = await anyio.to_thread.run_sync(blob_store.find, digest)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    
+    # The client will reference this URL without uploading; restart its GC grace period
+    url = blob_store.url_for_path(path)
+    size = path.stat().st_size
+    try:
+        await async_db.run_in_transaction(register_blob, digest, url, size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not register upload: {str(e)}")
+    
+    # A GC run may have removed the file before the row was refreshed
+    if not await anyio.to_thread.run_sync(path.exists):
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return {"sha256": digest, "url": url, "size": size}
+
+def _collect_orphans(cursor, grace_seconds: int):
+    removed, files = [], 0
+    for digest in find_orphans(cursor, grace_seconds):
+        if forget_blob(cursor, digest, grace_seconds):
+            # The deleted row stays locked until commit, so an upload of the same content
+            # waits in register_blob and then finds no file and stores it again
+            files += blob_store.delete(digest)
+            removed.append(digest)
+    return removed, files
+
+@router.post("/gc")
+async def collect_garbage(grace_hours: int = Query(24, ge=0)):
+    """Delete uploads no report or donation has referenced for grace_hours"""
+    try:
+        removed, files = await async_db.run_in_transaction(_collect_orphans, grace_hours * 3600)
+        return {"blobs_removed": len(removed), "files_removed": files}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/health")
 async def health_check():
     """Check if upload service is running"""
     return {
         "status": "healthy",
         "upload_dir": str(UPLOAD_DIR),
-        "can_write": UPLOAD_DIR.exists()
+        "can_write": UPLOAD_DIR.exists(),
+        "derivatives": DerivativeService.stats()
     }
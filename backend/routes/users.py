@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from schemas import UserCreate, UserResponse, LeaderboardEntry
-from database import db
+from database import async_db
+from utils.leaderboard import leaderboard, award_points, windowed_leaderboard, PERIODS
 from typing import List
 
 router = APIRouter()
@@ -11,7 +12,7 @@ async def get_users():
     """Get all users"""
     try:
         query = "SELECT id, email, name, phone, role, points, badge, reports_submitted, status, created_at FROM users"
-        result = db.execute_query(query, fetch=True)
+        result = await async_db.execute_query(query, fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -22,7 +23,7 @@ async def get_user(user_id: int):
     """Get user by ID"""
     try:
         query = "SELECT id, email, name, phone, role, points, badge, reports_submitted, status, created_at FROM users WHERE id = %s"
-        result = db.execute_query(query, (user_id,), fetch=True)
+        result = await async_db.execute_query(query, (user_id,), fetch=True)
         
         if not result:
             raise HTTPException(status_code=404, detail="User not found")
@@ -33,12 +34,56 @@ async def get_user(user_id: int):
 
 # ===== GET LEADERBOARD =====
 @router.get("/leaderboard/top")
-async def get_leaderboard():
+async def get_leaderboard(limit: int = Query(100, ge=1, le=1000)):
     """Get leaderboard"""
     try:
-        query = "SELECT * FROM leaderboard LIMIT 100"
-        result = db.execute_query(query, fetch=True)
-        return result
+        await leaderboard.ensure_loaded()
+        return leaderboard.top(limit)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/leaderboard/period/{period}")
+async def get_period_leaderboard(period: str, city: str = None, limit: int = Query(100, ge=1, le=1000)):
+    """Get this week's, this month's or the all-time leaderboard, optionally for one city"""
+    try:
+        if period not in PERIODS:
+            raise HTTPException(status_code=400, detail=f"Period must be one of: {', '.join(PERIODS)}")
+        if period == "all" and not city:
+            # Global all-time board is already ranked in memory; users.points equals the
+            # ledger total (schema_v6 backfills the history), so city boards add up the same
+            await leaderboard.ensure_loaded()
+            return leaderboard.top(limit)
+        return await windowed_leaderboard(period, city, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/leaderboard/rank/{user_id}")
+async def get_leaderboard_rank(user_id: int):
+    """Get a citizen's leaderboard entry and rank"""
+    try:
+        await leaderboard.ensure_loaded()
+        entry = leaderboard.rank_of(user_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="User is not on the leaderboard")
+        return entry
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/leaderboard/around/{user_id}")
+async def get_leaderboard_around(user_id: int, radius: int = Query(5, ge=0, le=50)):
+    """Get the citizens ranked just above and below a user"""
+    try:
+        await leaderboard.ensure_loaded()
+        entries = leaderboard.around(user_id, radius)
+        if entries is None:
+            raise HTTPException(status_code=404, detail="User is not on the leaderboard")
+        return entries
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -48,7 +93,7 @@ async def get_user_by_email(email: str):
     """Get user by email"""
     try:
         query = "SELECT id, email, name, phone, role, points, badge, reports_submitted, status, created_at FROM users WHERE email = %s"
-        result = db.execute_query(query, (email,), fetch=True)
+        result = await async_db.execute_query(query, (email,), fetch=True)
         
         if not result:
             raise HTTPException(status_code=404, detail="User not found")
@@ -63,7 +108,7 @@ async def get_workers():
     """Get all workers"""
     try:
         query = "SELECT id, email, name, phone, role, points, badge, reports_submitted, status, created_at FROM users WHERE role = 'worker' AND status = 'active'"
-        result = db.execute_query(query, fetch=True)
+        result = await async_db.execute_query(query, fetch=True)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -73,23 +118,7 @@ async def get_workers():
 async def update_user_points(user_id: int, points: int):
     """Add points to user"""
     try:
-        query = """
-            UPDATE users 
-            SET points = points + %s,
-                badge = CASE 
-                    WHEN points + %s >= 500 THEN 'platinum'
-                    WHEN points + %s >= 300 THEN 'gold'
-                    WHEN points + %s >= 200 THEN 'silver'
-                    WHEN points + %s >= 100 THEN 'bronze'
-                    ELSE 'citizen'
-                END
-            WHERE id = %s
-        """
-        params = (points, points, points, points, points, user_id)
-        db.execute_query(query, params)
-        
-        # Get updated user
-        result = db.execute_query("SELECT * FROM users WHERE id = %s", (user_id,), fetch=True)
-        return result[0] if result else None
+        # Update points and badge; the in-memory leaderboard follows after commit
+        return await async_db.run_in_transaction(award_points, user_id, points)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from schemas import ReportUpdate
-from database import db
+from database import async_db
+from utils.status_counters import REPORT, record_transition, set_worker_status
+from utils.leaderboard import award_points
+from utils.events import emit_report_event
+from utils.image_derivatives import with_derivative_urls
 from typing import List
 
 router = APIRouter()
@@ -31,41 +35,47 @@ async def get_worker_tasks(worker_id: int, status: str = None):
         
         query += " ORDER BY CASE r.priority WHEN 'urgent' THEN 1 WHEN 'high' THEN 2 WHEN 'medium' THEN 3 ELSE 4 END, r.created_at DESC"
         
-        result = db.execute_query(query, params, fetch=True)
-        return result
+        result = await async_db.execute_query(query, params, fetch=True)
+        return with_derivative_urls(result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== START WORKING ON TASK =====
+def _start_task(cursor, report_id: int, worker_id: int):
+    """Move an assigned task to in-progress and log it in one transaction"""
+    # Verify task is assigned to this worker (row stays locked until commit)
+    cursor.execute(
+        "SELECT * FROM reports WHERE id = %s AND assigned_worker_id = %s FOR UPDATE",
+        (report_id, worker_id)
+    )
+    task = cursor.fetchone()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found or not assigned to you")
+    
+    if task['status'] != 'assigned':
+        raise HTTPException(status_code=400, detail="Task is not in assigned status")
+    
+    # Update to in-progress
+    cursor.execute(
+        "UPDATE reports SET status = 'in-progress', updated_at = NOW() WHERE id = %s",
+        (report_id,)
+    )
+    record_transition(cursor, REPORT, 'assigned', 'in-progress')
+    emit_report_event(cursor, "started", report_id)
+    
+    # Log history
+    cursor.execute(
+        """INSERT INTO report_history 
+           (report_id, changed_by, old_status, new_status, action, notes)
+           VALUES (%s, %s, 'assigned', 'in-progress', 'started', 'Worker started the task')""",
+        (report_id, worker_id)
+    )
+
 @router.post("/tasks/{report_id}/start")
 async def start_task(report_id: int, worker_id: int):
     """Worker starts working on a task"""
     try:
-        # Verify task is assigned to this worker
-        check = db.execute_query(
-            "SELECT * FROM reports WHERE id = %s AND assigned_worker_id = %s",
-            (report_id, worker_id), fetch=True
-        )
-        if not check:
-            raise HTTPException(status_code=404, detail="Task not found or not assigned to you")
-        
-        if check[0]['status'] != 'assigned':
-            raise HTTPException(status_code=400, detail="Task is not in assigned status")
-        
-        # Update to in-progress
-        db.execute_query(
-            "UPDATE reports SET status = 'in-progress', updated_at = NOW() WHERE id = %s",
-            (report_id,)
-        )
-        
-        # Log history
-        db.execute_query(
-            """INSERT INTO report_history 
-               (report_id, changed_by, old_status, new_status, action, notes)
-               VALUES (%s, %s, 'assigned', 'in-progress', 'started', 'Worker started the task')""",
-            (report_id, worker_id)
-        )
-        
+        await async_db.run_in_transaction(_start_task, report_id, worker_id)
         return {"message": "Task started", "report_id": report_id}
     except HTTPException:
         raise
@@ -73,65 +83,58 @@ async def start_task(report_id: int, worker_id: int):
         raise HTTPException(status_code=400, detail=str(e))
 
 # ===== COMPLETE TASK =====
+def _complete_task(cursor, report_id: int, worker_id: int, notes: str = None):
+    """Complete a task, free the worker and award points in one transaction"""
+    # Verify task (row stays locked until commit)
+    cursor.execute(
+        "SELECT * FROM reports WHERE id = %s AND assigned_worker_id = %s FOR UPDATE",
+        (report_id, worker_id)
+    )
+    task = cursor.fetchone()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found or not assigned to you")
+    
+    if task['status'] != 'in-progress':
+        raise HTTPException(status_code=400, detail="Task is not in progress")
+    
+    # Update to completed
+    cursor.execute(
+        """UPDATE reports SET 
+           status = 'completed', 
+           worker_notes = %s,
+           completed_at = NOW(),
+           updated_at = NOW() 
+           WHERE id = %s""",
+        (notes, report_id)
+    )
+    record_transition(cursor, REPORT, 'in-progress', 'completed')
+    emit_report_event(cursor, "completed", report_id)
+    
+    # Update worker status back to available
+    set_worker_status(cursor, worker_id, 'available')
+    
+    # Award points to citizen
+    citizen_id = task['user_id']
+    bonus_points = task['bonus_points'] or 0
+    total_points = task['points'] + bonus_points
+    
+    award_points(cursor, citizen_id, total_points, reason='report_completed', report_id=report_id, city=task['city'])
+    
+    # Log history
+    cursor.execute(
+        """INSERT INTO report_history 
+           (report_id, changed_by, old_status, new_status, action, notes)
+           VALUES (%s, %s, 'in-progress', 'completed', 'completed', %s)""",
+        (report_id, worker_id, notes or 'Task completed successfully')
+    )
+    
+    return total_points
+
 @router.post("/tasks/{report_id}/complete")
 async def complete_task(report_id: int, worker_id: int, notes: str = None):
     """Worker completes a task"""
     try:
-        # Verify task
-        check = db.execute_query(
-            "SELECT * FROM reports WHERE id = %s AND assigned_worker_id = %s",
-            (report_id, worker_id), fetch=True
-        )
-        if not check:
-            raise HTTPException(status_code=404, detail="Task not found or not assigned to you")
-        
-        if check[0]['status'] != 'in-progress':
-            raise HTTPException(status_code=400, detail="Task is not in progress")
-        
-        # Update to completed
-        db.execute_query(
-            """UPDATE reports SET 
-               status = 'completed', 
-               worker_notes = %s,
-               completed_at = NOW(),
-               updated_at = NOW() 
-               WHERE id = %s""",
-            (notes, report_id)
-        )
-        
-        # Update worker status back to available
-        db.execute_query(
-            "UPDATE users SET worker_status = 'available' WHERE id = %s",
-            (worker_id,)
-        )
-        
-        # Award points to citizen
-        citizen_id = check[0]['user_id']
-        bonus_points = check[0]['bonus_points'] or 0
-        total_points = check[0]['points'] + bonus_points
-        
-        db.execute_query(
-            """UPDATE users SET 
-               points = points + %s,
-               badge = CASE 
-                   WHEN points + %s >= 500 THEN 'platinum'
-                   WHEN points + %s >= 300 THEN 'gold'
-                   WHEN points + %s >= 200 THEN 'silver'
-                   WHEN points + %s >= 100 THEN 'bronze'
-                   ELSE 'citizen'
-               END
-               WHERE id = %s""",
-            (total_points, total_points, total_points, total_points, total_points, citizen_id)
-        )
-        
-        # Log history
-        db.execute_query(
-            """INSERT INTO report_history 
-               (report_id, changed_by, old_status, new_status, action, notes)
-               VALUES (%s, %s, 'in-progress', 'completed', 'completed', %s)""",
-            (report_id, worker_id, notes or 'Task completed successfully')
-        )
-        
+        total_points = await async_db.run_in_transaction(_complete_task, report_id, worker_id, notes)
         return {"message": "Task completed", "report_id": report_id, "points_awarded": total_points}
     except HTTPException:
         raise
@@ -143,7 +146,7 @@ async def complete_task(report_id: int, worker_id: int, notes: str = None):
 async def add_worker_note(report_id: int, worker_id: int, note: str):
     """Worker adds a note to a task"""
     try:
-        db.execute_query(
+        await async_db.execute_query(
             "UPDATE reports SET worker_notes = %s, updated_at = NOW() WHERE id = %s AND assigned_worker_id = %s",
             (note, report_id, worker_id)
         )
@@ -156,22 +159,16 @@ async def add_worker_note(report_id: int, worker_id: int, note: str):
 async def get_worker_stats(worker_id: int):
     """Get worker's statistics"""
     try:
-        assigned = db.execute_query(
-            "SELECT COUNT(*) as count FROM reports WHERE assigned_worker_id = %s AND status = 'assigned'",
+        rows = await async_db.execute_query(
+            "SELECT status, COUNT(*) as count FROM reports WHERE assigned_worker_id = %s GROUP BY status",
             (worker_id,), fetch=True
-        )[0]['count']
-        
-        in_progress = db.execute_query(
-            "SELECT COUNT(*) as count FROM reports WHERE assigned_worker_id = %s AND status = 'in-progress'",
-            (worker_id,), fetch=True
-        )[0]['count']
-        
-        completed = db.execute_query(
-            "SELECT COUNT(*) as count FROM reports WHERE assigned_worker_id = %s AND status = 'completed'",
-            (worker_id,), fetch=True
-        )[0]['count']
+        )
+        counts = {row['status']: row['count'] for row in rows}
+        assigned = counts.get('assigned', 0)
+        in_progress = counts.get('in-progress', 0)
+        completed = counts.get('completed', 0)
         
-        worker = db.execute_query(
+        worker = await async_db.execute_query(
             "SELECT worker_status FROM users WHERE id = %s",
             (worker_id,), fetch=True
         )
@@ -195,10 +192,7 @@ async def update_status(worker_id: int, status: str):
         if status not in ['available', 'busy', 'offline']:
             raise HTTPException(status_code=400, detail="Invalid status")
         
-        db.execute_query(
-            "UPDATE users SET worker_status = %s WHERE id = %s AND role = 'worker'",
-            (status, worker_id)
-        )
+        await async_db.run_in_transaction(set_worker_status, worker_id, status)
         return {"message": "Status updated", "worker_id": worker_id, "status": status}
     except HTTPException:
         raise
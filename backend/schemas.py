@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, computed_field
+from typing import Dict, Optional
 from datetime import datetime
+from utils.image_derivatives import derivative_urls
 
 # ===== USER MODELS =====
 class UserBase(BaseModel):
@@ -66,9 +67,18 @@ class ReportResponse(ReportBase):
     updated_at: datetime
     completed_at: Optional[datetime] = None
 
+    # Thumbnail / medium / WebP URLs for list views (None when the photo has none)
+    @computed_field
+    @property
+    def image_derivatives(self) -> Optional[Dict[str, str]]:
+        return derivative_urls(self.image_url)
+
     class Config:
         from_attributes = True
 
+class ReportNearbyResponse(ReportResponse):
+    distance_m: Optional[float] = None  # Distance from the search point in meters
+
 # ===== DONATION MODELS =====
 class DonationBase(BaseModel):
     title: str
@@ -0,0 +1,61 @@
+import pytest
+from fastapi import HTTPException
+
+from utils.blob_store import BlobStore, adjust_refs, digest_from_url, normalize_extension
+
+DIGEST = "0123456789abcdef" * 4
+
+
+class FakeCursor:
+    """Records statements; rowcount says whether the UPDATE found a row"""
+
+    def __init__(self, rowcount=1):
+        self.rowcount = rowcount
+        self.statements = []
+
+    def execute(self, query, params=()):
+        self.statements.append(params)
+
+
+def test_digest_from_url():
+    assert digest_from_url(f"/uploads/01/23/{DIGEST}.jpg") == DIGEST
+    assert digest_from_url("/uploads/1700000000_photo.jpg") is None
+    assert digest_from_url(None) is None
+
+
+def test_normalize_extension():
+    assert normalize_extension("Photo.JPG") == ".jpg"
+    assert normalize_extension("evil.ph p") == ""
+    assert normalize_extension("noext") == ""
+
+
+def test_commit_deduplicates_and_delete_removes_derivatives(tmp_path):
+    store = BlobStore(tmp_path)
+    first = tmp_path / "upload-1.part"
+    first.write_bytes(b"data")
+    path, deduplicated = store.commit(str(first), DIGEST, ".jpg")
+    assert not deduplicated and path.read_bytes() == b"data"
+    assert store.url_for_path(path) == f"/uploads/01/23/{DIGEST}.jpg"
+
+    second = tmp_path / "upload-2.part"
+    second.write_bytes(b"data")
+    assert store.commit(str(second), DIGEST, ".png") == (path, True)
+    assert not second.exists()
+
+    (path.parent / f"{DIGEST}.thumb.jpg").write_bytes(b"thumb")
+    assert store.delete(DIGEST) == 2
+    assert store.find(DIGEST) is None
+
+
+def test_adjust_refs_counts_each_blob_once():
+    cursor = FakeCursor()
+    url = f"/uploads/01/23/{DIGEST}.jpg"
+    adjust_refs(cursor, [url, url, None, "/uploads/legacy.jpg"], 1)
+    assert cursor.statements == [(1, DIGEST)]
+
+
+def test_adding_a_reference_to_a_collected_blob_fails():
+    with pytest.raises(HTTPException) as error:
+        adjust_refs(FakeCursor(rowcount=0), [f"/uploads/01/23/{DIGEST}.jpg"], 1)
+    assert error.value.status_code == 400
+    adjust_refs(FakeCursor(rowcount=0), [f"/uploads/01/23/{DIGEST}.jpg"], -1)
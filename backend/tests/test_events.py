@@ -0,0 +1,82 @@
+import asyncio
+
+from utils.events import EventBroker
+
+
+def _drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return events
+
+
+def _run(scenario, **params):
+    async def run():
+        broker = EventBroker(**params)
+        broker.start()
+        return scenario(broker)
+    return asyncio.run(run())
+
+
+def _publish(broker, count, **fields):
+    for i in range(count):
+        broker.publish({"type": "report_updated", "report_id": i, "department_id": 1, **fields})
+
+
+def test_subscribers_only_get_matching_events():
+    def scenario(broker):
+        department = broker.subscribe({"department_id": 2})
+        everything = broker.subscribe({})
+        _publish(broker, 2)
+        _publish(broker, 1, department_id=2)
+        return _drain(department), _drain(everything)
+
+    department, everything = _run(scenario)
+    assert [event["id"] for event in department] == [3]
+    assert [event["id"] for event in everything] == [1, 2, 3]
+
+
+def test_missed_events_are_replayed_from_last_event_id():
+    def scenario(broker):
+        _publish(broker, 5)
+        return _drain(broker.subscribe({}, last_event_id=3))
+
+    assert [event["id"] for event in _run(scenario)] == [4, 5]
+
+
+def test_gap_older_than_the_history_resets():
+    def scenario(broker):
+        _publish(broker, 10)
+        return _drain(broker.subscribe({}, last_event_id=2))
+
+    assert _run(scenario, history_size=5) == [{"type": "reset", "id": 10}]
+
+
+def test_id_ahead_of_the_server_resets_after_a_restart():
+    def scenario(broker):
+        _publish(broker, 2)
+        return _drain(broker.subscribe({}, last_event_id=500)), _drain(broker.subscribe({}, last_event_id=2))
+
+    restarted, current = _run(scenario)
+    assert restarted == [{"type": "reset", "id": 2}]
+    assert current == []
+
+
+def test_slow_subscriber_is_closed():
+    def scenario(broker):
+        slow = broker.subscribe({})
+        _publish(broker, 3)
+        return _drain(slow), broker.stats()
+
+    events, stats = _run(scenario, queue_size=2)
+    assert events == [None]
+    assert stats["subscribers"] == 0 and stats["dropped_subscribers"] == 1
+
+
+def test_close_ends_every_stream():
+    def scenario(broker):
+        subscription = broker.subscribe({})
+        broker.close()
+        return _drain(subscription), broker.stats()["subscribers"]
+
+    assert _run(scenario) == ([None], 0)
@@ -0,0 +1,56 @@
+import math
+
+from utils import geohash
+
+
+def _contains(prefixes, lat, lon):
+    code = geohash.encode(lat, lon)
+    return any(code.startswith(prefix) for prefix in prefixes)
+
+
+def test_encode_known_values():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash.encode(0, 0, 5) == "s0000"
+    assert len(geohash.encode(18.52, 73.85)) == geohash.MAX_PRECISION
+
+
+def test_prefix_is_enclosing_cell():
+    assert geohash.encode(18.5204, 73.8567, 5) == geohash.encode(18.5204, 73.8567)[:5]
+
+
+def test_cell_size_halves_per_bit():
+    lat, lon = geohash.cell_size(1)
+    assert (lat, lon) == (45.0, 45.0)
+    lat, lon = geohash.cell_size(2)
+    assert (lat, lon) == (45.0 / 8, 45.0 / 4)
+
+
+def test_cover_contains_every_point_of_the_box():
+    box = (18.50, 73.80, 18.56, 73.90)
+    prefixes = geohash.cover(*box)
+    assert 0 < len(prefixes) <= 16
+    for i in range(11):
+        for j in range(11):
+            lat = box[0] + (box[2] - box[0]) * i / 10
+            lon = box[1] + (box[3] - box[1]) * j / 10
+            assert _contains(prefixes, lat, lon)
+
+
+def test_cover_across_the_antimeridian_edge_and_equator():
+    prefixes = geohash.cover(-0.01, 179.9, 0.01, 180.0)
+    assert _contains(prefixes, 0.0, 179.95)
+    assert _contains(prefixes, -0.005, 180.0)
+
+
+def test_cover_picks_longer_prefixes_for_smaller_boxes():
+    small = geohash.cover(18.5204, 73.8567, 18.5205, 73.8568)
+    large = geohash.cover(18.0, 73.0, 19.0, 74.0)
+    assert len(small[0]) > len(large[0])
+    assert len(geohash.cover(18.0, 73.0, 19.0, 74.0, max_cells=4)) <= 4
+
+
+def test_radius_bbox_encloses_the_circle():
+    min_lat, min_lon, max_lat, max_lon = geohash.radius_bbox(18.52, 73.85, 1000)
+    assert math.isclose(max_lat - 18.52, 1000 / geohash.METERS_PER_DEGREE_LAT)
+    assert max_lon - 73.85 > max_lat - 18.52  # longitude degrees shrink away from the equator
+    assert geohash.radius_bbox(89.99, 0, 5000)[2] == 90.0
@@ -0,0 +1,88 @@
+import random
+
+from utils.leaderboard import Leaderboard, RankedSkipList, period_start
+from datetime import date
+
+
+def _user(user_id, points, role="citizen", status="active"):
+    return {"id": user_id, "name": f"user {user_id}", "points": points, "role": role, "status": status}
+
+
+def test_skiplist_matches_a_sorted_list():
+    random.seed(7)
+    skiplist, expected = RankedSkipList(), []
+    for _ in range(2000):
+        key = random.randrange(500)
+        if key in expected and random.random() < 0.5:
+            assert skiplist.remove(key)
+            expected.remove(key)
+        else:
+            skiplist.insert(key)
+            if key not in expected:
+                expected.append(key)
+                expected.sort()
+        assert len(skiplist) == len(expected)
+    assert skiplist.slice(0, len(expected)) == expected
+    for key in (0, 123, 250, 499, 600):
+        assert skiplist.count_less(key) == sum(1 for k in expected if k < key)
+    assert skiplist.slice(10, 20) == expected[10:20]
+    assert not skiplist.remove(-1)
+
+
+def test_skiplist_from_sorted_supports_updates():
+    skiplist = RankedSkipList.from_sorted(list(range(0, 100, 2)))
+    skiplist.insert(5)
+    skiplist.remove(10)
+    assert skiplist.slice(0, 6) == [0, 2, 4, 5, 6, 8]
+    assert skiplist.count_less(12) == 6
+    assert skiplist.slice(48, 100) == [96, 98]
+    assert skiplist.slice(5, 3) == []
+
+
+def test_leaderboard_ranks_ties_like_sql_rank():
+    board = Leaderboard()
+    board.replace([_user(1, 50), _user(2, 80), _user(3, 50), _user(4, 10)])
+    top = board.top(10)
+    assert [(e["id"], e["rank"]) for e in top] == [(2, 1), (1, 2), (3, 2), (4, 4)]
+    assert board.rank_of(3)["rank"] == 2
+    assert board.rank_of(99) is None
+
+
+def test_leaderboard_skips_inactive_and_non_citizens():
+    board = Leaderboard()
+    board.replace([_user(1, 50), _user(2, 90, role="worker"), _user(3, 70, status="blocked")])
+    assert [e["id"] for e in board.top(10)] == [1]
+
+
+def test_leaderboard_updates_move_and_drop_users():
+    board = Leaderboard()
+    board.replace([_user(1, 10), _user(2, 20), _user(3, 30)])
+    board.update(_user(1, 40))
+    assert [e["id"] for e in board.top(3)] == [1, 3, 2]
+    board.update(_user(3, 30, status="blocked"))
+    assert [e["id"] for e in board.top(3)] == [1, 2]
+    assert board.stats() == {"loaded": True, "users": 2, "updates": 2}
+
+
+def test_leaderboard_around_a_user():
+    board = Leaderboard()
+    board.replace([_user(i, 100 - i) for i in range(1, 21)])
+    around = board.around(10, radius=2)
+    assert [e["id"] for e in around] == [8, 9, 10, 11, 12]
+    assert [e["rank"] for e in around] == [8, 9, 10, 11, 12]
+    assert [e["id"] for e in board.around(1, radius=2)] == [1, 2, 3]
+
+
+def test_updates_during_a_reload_are_replayed():
+    board = Leaderboard()
+    board._pending = {}
+    board.update(_user(5, 500))
+    board.replace([_user(5, 10), _user(6, 20)])
+    assert board.top(1)[0]["id"] == 5
+
+
+def test_period_start_is_calendar_aligned():
+    day = date(2026, 10, 15)  # a Thursday
+    assert period_start("week", day) == date(2026, 10, 12)
+    assert period_start("month", day) == date(2026, 10, 1)
+    assert period_start("all", day) == date(1970, 1, 1)
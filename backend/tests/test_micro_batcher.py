@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.micro_batcher import MicroBatcher, QueueFullError
+
+
+def test_concurrent_items_share_a_batch():
+    seen = []
+
+    def double(items):
+        seen.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(double, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(6)])
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert [len(batch) for batch in seen] == [4, 2]
+    assert stats["batches"] == 2 and stats["avg_batch_size"] == 3.0
+
+
+def test_full_queue_rejects_new_items():
+    release = threading.Event()
+
+    def slow(items):
+        release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0, max_queue=2)
+        waiting = [asyncio.create_task(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await batcher.submit(99)
+        release.set()
+        results = await asyncio.gather(*waiting)
+        await batcher.stop()
+        return results, batcher.rejected
+
+    assert asyncio.run(run()) == ([0, 1], 1)
+
+
+def test_batch_errors_reach_every_caller():
+    def broken(items):
+        raise RuntimeError("model crashed")
+
+    async def run():
+        batcher = MicroBatcher(broken, max_batch_size=2, max_wait_ms=20)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        await batcher.stop()
+        return results, batcher.failed_batches
+
+    results, failed = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert failed == 1
+
+
+def test_throughput_history_stays_within_the_window():
+    async def run():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=1, max_wait_ms=0, throughput_window=0.01)
+        for i in range(20):
+            await batcher.submit(i)
+            await asyncio.sleep(0.002)
+        await asyncio.sleep(0.02)
+        stats = batcher.stats()
+        await batcher.stop()
+        return batcher, stats
+
+    batcher, stats = asyncio.run(run())
+    assert batcher.items == 20
+    assert len(batcher._completed) == 0
+    assert stats["throughput_per_s"] == 0.0
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE, NEWEST_FIRST, decode_cursor, encode_cursor, keyset_condition,
+    limit_clause, page_size, paginate, select_fields,
+)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor((datetime(2026, 1, 2, 3, 4, 5), 42))
+    assert decode_cursor(cursor, 2) == ["2026-01-02 03:04:05", 42]
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor([1]), "e30"])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 2)
+    assert error.value.status_code == 400
+
+
+def test_keyset_condition_uses_a_row_comparison_for_one_direction():
+    assert keyset_condition(NEWEST_FIRST, ["t", 7]) == ("(created_at, id) < (%s, %s)", ["t", 7])
+
+
+def test_keyset_condition_expands_mixed_directions():
+    clause, params = keyset_condition([("p", "ASC"), ("created_at", "DESC")], [1, "t"])
+    assert clause == "((p > %s) OR (p = %s AND created_at < %s))"
+    assert params == [1, 1, "t"]
+
+
+def test_paginate_builds_a_cursor_only_when_more_rows_exist():
+    rows = [{"created_at": "t", "id": i} for i in range(3, 0, -1)]
+    page, cursor = paginate(rows, 2, lambda row: (row["created_at"], row["id"]))
+    assert [row["id"] for row in page] == [3, 2]
+    assert decode_cursor(cursor, 2) == ["t", 2]
+    assert paginate(rows, 3, lambda row: row["id"]) == (rows, None)
+    assert paginate(rows, None, lambda row: row["id"]) == (rows, None)
+
+
+def test_listings_stay_unbounded_without_limit_or_cursor():
+    params = []
+    assert limit_clause(page_size(None, None), params) == "" and params == []
+    assert limit_clause(page_size(None, "cursor"), params) == " LIMIT %s" and params == [DEFAULT_PAGE_SIZE + 1]
+    assert page_size(10, None) == 10
+
+
+def test_select_fields_adds_cursor_columns_and_rejects_unknown_ones():
+    allowed = {"id": "r.id", "status": "r.status", "created_at": "r.created_at"}
+    assert select_fields("status", allowed) == "r.`status` AS `status`, r.`id` AS `id`, r.`created_at` AS `created_at`"
+    assert select_fields(None, allowed) is None
+    with pytest.raises(HTTPException):
+        select_fields("password", allowed)
@@ -0,0 +1,75 @@
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from utils.static_uploads import IMMUTABLE_CACHE, UploadFiles, is_content_addressed, parse_range
+
+DIGEST = "ab" * 32
+BODY = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def client(tmp_path):
+    shard = tmp_path / "ab" / "ab"
+    shard.mkdir(parents=True)
+    (shard / f"{DIGEST}.mp4").write_bytes(BODY)
+    (tmp_path / "legacy.jpg").write_bytes(b"old upload")
+    app = Starlette(routes=[Mount("/uploads", UploadFiles(directory=str(tmp_path)))])
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=10-5000", (10, 1023)),
+    ("bytes=20-10", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(BODY)) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, len(BODY))
+
+
+def test_content_addressed_paths():
+    assert is_content_addressed(f"ab/ab/{DIGEST}.thumb.jpg")
+    assert not is_content_addressed(f"cd/ab/{DIGEST}.jpg")
+    assert not is_content_addressed("legacy.jpg")
+
+
+def test_partial_content(client):
+    response = client.get(f"/uploads/ab/ab/{DIGEST}.mp4", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+
+
+def test_unsatisfiable_range(client):
+    response = client.get(f"/uploads/ab/ab/{DIGEST}.mp4", headers={"Range": "bytes=5000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_stale_if_range_sends_the_whole_file(client):
+    response = client.get(
+        f"/uploads/ab/ab/{DIGEST}.mp4", headers={"Range": "bytes=0-9", "If-Range": '"other"'}
+    )
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+def test_etag_revalidation(client):
+    first = client.get("/uploads/legacy.jpg")
+    assert first.status_code == 200 and first.content == b"old upload"
+    again = client.get("/uploads/legacy.jpg", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,50 @@
+from utils.text_index import InvertedIndex, tokenize
+
+DOCUMENTS = [
+    {"title": "Plastic bottle planter", "body": "Cut a plastic bottle and grow herbs in it"},
+    {"title": "Tyre swing", "body": "Hang an old tyre from a strong branch"},
+    {"title": "Glass jar lamp", "body": "Put fairy lights inside a glass jar"},
+    {"title": "Bottle cap mosaic", "body": "Glue caps onto a board to make a mosaic"},
+]
+
+
+def _index(**params):
+    return InvertedIndex.build(DOCUMENTS, {"title": 2.0, "body": 1.0}, **params)
+
+
+def test_tokenize_drops_short_words_and_stopwords():
+    assert tokenize("How can I reuse THE old bottles, e.g. 2 jars?") == ["reuse", "old", "bottles", "jars"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_matching_documents():
+    results = _index().search("plastic bottle")
+    assert [doc for doc, _ in results] == [0, 3]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_title_weight_outranks_body_match():
+    index = InvertedIndex.build(
+        [{"title": "", "body": "lamp"}, {"title": "lamp", "body": ""}],
+        {"title": 2.0, "body": 1.0},
+    )
+    assert [doc for doc, _ in index.search("lamp")] == [1, 0]
+
+
+def test_search_limits_and_orders_ties_by_position():
+    index = InvertedIndex.build([{"body": "jar"}] * 5, {"body": 1.0})
+    assert [doc for doc, _ in index.search("jar", k=3)] == [0, 1, 2]
+
+
+def test_search_without_matches_or_terms():
+    index = _index()
+    assert index.search("spaceship") == []
+    assert index.search("the and of") == []
+    assert InvertedIndex({"body": 1.0}).finalize().search("jar") == []
+
+
+def test_precomputed_tokens_and_sizes():
+    index = _index()
+    assert len(index) == len(DOCUMENTS)
+    assert index.vocabulary_size > 10
+    assert index.search("ignored", tokens=["tyre"])[0][0] == 1
@@ -0,0 +1,176 @@
+"""
+Content-addressed storage for uploaded files
+Files are stored once under their SHA-256 in a sharded layout
+(uploads/ab/cd/abcd....jpg), so identical uploads share one copy and one URL.
+The upload_blobs table counts how many reports/donations reference each blob;
+unreferenced blobs are removed by POST /api/uploads/gc after a grace period.
+
+Uploads register their digest before looking for a stored copy, and GC deletes
+a row and its file in one transaction, so the row lock orders the two: either
+the upload refreshes the row first (GC then skips it) or it waits for GC to
+finish and stores the file again.
+"""
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+from fastapi import HTTPException
+from database import insert_row
+
+URL_PREFIX = "/uploads"
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_URL_RE = re.compile(r"^/uploads/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(?:\.[A-Za-z0-9]+)?$")
+
+
+def normalize_extension(filename: str) -> str:
+    """Lower-cased extension limited to safe characters ('' when unusable)"""
+    ext = os.path.splitext(filename)[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,10}", ext) else ""
+
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.match(value))
+
+
+def digest_from_url(url: Optional[str]) -> Optional[str]:
+    """Return the SHA-256 of a content-addressed upload URL, or None for other URLs"""
+    if not url:
+        return None
+    match = _URL_RE.match(url)
+    return match.group(1) if match else None
+
+
+class BlobStore:
+    """Sharded directory of files named by their content hash"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def shard_dir(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4]
+
+    def relative_path(self, digest: str, ext: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def url_for(self, digest: str, ext: str) -> str:
+        return f"{URL_PREFIX}/{self.relative_path(digest, ext)}"
+
+    def find(self, digest: str) -> Optional[Path]:
+        """Return the stored original for a digest, whatever its extension"""
+        directory = self.shard_dir(digest)
+        if not directory.is_dir():
+            return None
+        for path in directory.iterdir():
+            stem, ext = os.path.splitext(path.name)
+            if stem == digest:
+                return path
+        return None
+
+    def url_for_path(self, path: Path) -> str:
+        return f"{URL_PREFIX}/{path.relative_to(self.root).as_posix()}"
+
+    def commit(self, temp_path: str, digest: str, ext: str):
+        """
+        Move a finished temp file into place under its digest
+        Returns (path, deduplicated); a duplicate temp file is discarded
+        """
+        existing = self.find(digest)
+        if existing is not None:
+            os.unlink(temp_path)
+            return existing, True
+        target = self.shard_dir(digest) / f"{digest}{ext}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, target)
+        return target, False
+
+    def delete(self, digest: str) -> int:
+        """Remove a blob and any derived files stored next to it"""
+        directory = self.shard_dir(digest)
+        removed = 0
+        if directory.is_dir():
+            for path in directory.iterdir():
+                if path.name.startswith(digest):
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        return removed
+
+
+# ===== REFERENCE COUNTING (run on a transaction cursor) =====
+
+def register_blob(cursor, digest: str, url: str, size: int) -> None:
+    """
+    Record a stored blob
+    Re-registering an existing digest restarts its GC grace period, so a deduplicated
+    upload whose URL was just handed out can't be collected before it is referenced
+    """
+    cursor.execute(
+        """INSERT INTO upload_blobs (sha256, url, size) VALUES (%s, %s, %s)
+           ON DUPLICATE KEY UPDATE last_referenced_at = NOW()""",
+        (digest, url, size)
+    )
+
+
+def adjust_refs(cursor, urls: Iterable[Optional[str]], delta: int) -> None:
+    """
+    Add delta to the reference count of every content-addressed URL given
+    Adding references to a blob that is no longer registered (already garbage-collected)
+    raises a 400 so the row is never saved pointing at a missing file
+    """
+    for digest in sorted({digest_from_url(url) for url in urls} - {None}):
+        cursor.execute(
+            """UPDATE upload_blobs
+               SET ref_count = GREATEST(ref_count + %s, 0), last_referenced_at = NOW()
+               WHERE sha256 = %s""",
+            (delta, digest)
+        )
+        if delta > 0 and cursor.rowcount == 0:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Uploaded file {digest} no longer exists; upload it again"
+            )
+
+
+ORPHAN_CONDITION = """ref_count = 0
+             AND COALESCE(last_referenced_at, created_at) < NOW() - INTERVAL %s SECOND"""
+
+
+def find_orphans(cursor, grace_seconds: int, limit: int = 500) -> List[str]:
+    """Digests nobody references that are older than the grace period"""
+    cursor.execute(
+        f"SELECT sha256 FROM upload_blobs WHERE {ORPHAN_CONDITION} LIMIT %s",
+        (grace_seconds, limit)
+    )
+    return [row["sha256"] for row in cursor.fetchall()]
+
+
+def forget_blob(cursor, digest: str, grace_seconds: int) -> bool:
+    """
+    Delete a blob row if it is still an orphan; True when it was removed
+    Re-checked under the row lock, since an upload may have re-registered or referenced it
+    since find_orphans. Delete the file before committing so the lock covers it
+    """
+    cursor.execute(
+        f"DELETE FROM upload_blobs WHERE sha256 = %s AND {ORPHAN_CONDITION}",
+        (digest, grace_seconds)
+    )
+    return cursor.rowcount > 0
+
+
+def insert_with_refs(cursor, query, params, table: str, urls: Iterable[Optional[str]]):
+    """Insert a row that points at uploads and count the new references"""
+    row = insert_row(cursor, query, params, table)
+    adjust_refs(cursor, urls, 1)
+    return row
+
+
+def delete_with_refs(cursor, table: str, row_id: int, url_columns: Sequence[str]) -> int:
+    """Delete a row and release the uploads it referenced; returns rows deleted"""
+    cursor.execute(f"SELECT {', '.join(url_columns)} FROM {table} WHERE id = %s FOR UPDATE", (row_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return 0
+    cursor.execute(f"DELETE FROM {table} WHERE id = %s", (row_id,))
+    deleted = cursor.rowcount
+    adjust_refs(cursor, row.values(), -1)
+    return deleted
@@ -0,0 +1,162 @@
+"""
+In-process pub/sub for report lifecycle events (served as Server-Sent Events)
+Transition handlers call emit_report_event() on their transaction cursor; the
+event is published only after the transaction commits, so clients never hear
+about a change that was rolled back. Each subscriber gets a bounded queue and
+a filter (department, worker and/or citizen); a subscriber that falls too far
+behind is disconnected and resumes from its Last-Event-ID, which is replayed
+from a short in-memory history.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from database import db
+
+REPORT_EVENT_COLUMNS = "id, user_id, department_id, assigned_worker_id, status, category, city, priority"
+
+# Subscriber filter name -> event field
+FILTER_FIELDS = {
+    "department_id": "department_id",
+    "worker_id": "assigned_worker_id",
+    "user_id": "user_id",
+}
+
+
+class Subscription:
+    def __init__(self, filters: Dict[str, int], maxsize: int):
+        self.filters = filters
+        # None in the queue tells the stream to close
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        return all(event.get(FILTER_FIELDS[name]) == value for name, value in self.filters.items())
+
+
+class EventBroker:
+    """Fan-out of events to filtered subscribers on the event loop"""
+
+    def __init__(self, history_size: int = 1000, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[Subscription] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_id = 0
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Queue an event for delivery; safe to call from worker threads"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, event)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        # Ids are assigned on the loop so they follow delivery order
+        self._last_id += 1
+        event = {**event, "id": self._last_id}
+        self._history.append(event)
+        self.published += 1
+        for subscription in list(self._subscribers):
+            if subscription.matches(event):
+                self._offer(subscription, event)
+
+    def _offer(self, subscription: Subscription, event: Dict[str, Any]) -> None:
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow: make room for the close marker; the client reconnects with Last-Event-ID
+            self.unsubscribe(subscription)
+            self.dropped_subscribers += 1
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+
+    def subscribe(self, filters: Dict[str, int], last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Register a subscriber; with last_event_id, matching events it missed are queued first
+        A {"type": "reset"} event is queued when the gap is older than the history, or when
+        last_event_id is ahead of this process (ids restart from 0 when the server restarts)
+        """
+        if self._loop is None:
+            self.start()
+        subscription = Subscription(filters, self.queue_size)
+        if last_event_id is not None and last_event_id > self._last_id:
+            subscription.queue.put_nowait({"type": "reset", "id": self._last_id})
+        elif last_event_id is not None and last_event_id < self._last_id:
+            oldest = self._history[0]["id"] if self._history else self._last_id + 1
+            missed = [
+                event for event in self._history
+                if event["id"] > last_event_id and subscription.matches(event)
+            ]
+            if last_event_id < oldest - 1 or len(missed) >= self.queue_size:
+                subscription.queue.put_nowait({"type": "reset", "id": self._last_id})
+            else:
+                for event in missed:
+                    subscription.queue.put_nowait(event)
+        self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.remove(subscription)
+
+    def close(self) -> None:
+        """End every open stream (on shutdown)"""
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "last_event_id": self._last_id,
+            "history": len(self._history),
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+broker = EventBroker(
+    history_size=int(os.getenv("EVENT_HISTORY_SIZE", 1000)),
+    queue_size=int(os.getenv("EVENT_QUEUE_SIZE", 100)),
+)
+
+
+def emit_report_event(cursor, event_type: str, report_id: int, report: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Publish a report lifecycle event once the current transaction commits
+    Reads the report's current routing fields unless the row is passed in (e.g. before a delete)
+    """
+    if report is None:
+        cursor.execute(f"SELECT {REPORT_EVENT_COLUMNS} FROM reports WHERE id = %s", (report_id,))
+        report = cursor.fetchone()
+        if not report:
+            return
+    event = {
+        "type": event_type,
+        "report_id": report_id,
+        "status": report.get('status'),
+        "user_id": report.get('user_id'),
+        "department_id": report.get('department_id'),
+        "assigned_worker_id": report.get('assigned_worker_id'),
+        "category": report.get('category'),
+        "city": report.get('city'),
+        "priority": report.get('priority'),
+        "timestamp": time.time(),
+    }
+    db.after_commit(lambda: broker.publish(event))
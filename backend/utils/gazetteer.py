@@ -0,0 +1,193 @@
+"""
+Offline reverse geocoding from a local gazetteer file
+Places are indexed in KD-trees (one per kind: road, suburb, city) over unit-sphere
+coordinates, so a reverse lookup is three nearest-neighbour searches in memory
+
+Supported files:
+- CSV/TSV with a header row: name, kind, latitude, longitude[, city, state, country, postcode]
+  where kind is road, suburb or city (e.g. exported from an OSM extract)
+- GeoNames dumps (e.g. IN.txt from download.geonames.org), optionally with
+  admin1CodesASCII.txt so states get their names instead of codes
+"""
+import csv
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_M = 6371000
+
+# How far away a place may be and still describe a location
+MAX_DISTANCE_M = {
+    "road": 250,
+    "suburb": 3000,
+    "city": 30000,
+}
+
+# GeoNames feature codes mapped onto our place kinds
+_GEONAMES_SUBURB_CODES = {"PPLX"}
+_GEONAMES_ROAD_CODES = {"RD", "ST", "RDJCT"}
+
+
+def _to_xyz(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def _chord(distance_m: float) -> float:
+    """Straight-line distance on the unit sphere for an arc length in meters"""
+    return 2 * math.sin(min(distance_m / EARTH_RADIUS_M, math.pi) / 2)
+
+
+class KDTree:
+    """Static 3-d tree answering nearest-neighbour queries"""
+
+    def __init__(self, points: Sequence[Tuple[float, float, float]]):
+        self._points = points
+        self._root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indexes: List[int], depth: int):
+        if not indexes:
+            return None
+        axis = depth % 3
+        indexes.sort(key=lambda i: self._points[i][axis])
+        mid = len(indexes) // 2
+        return (
+            indexes[mid],
+            axis,
+            self._build(indexes[:mid], depth + 1),
+            self._build(indexes[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, query: Tuple[float, float, float], max_distance: float) -> Optional[int]:
+        """Index of the closest point within max_distance (unit-sphere chord), or None"""
+        best, best_d2 = None, max_distance * max_distance
+        qx, qy, qz = query
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            px, py, pz = self._points[index]
+            d2 = (qx - px) ** 2 + (qy - py) ** 2 + (qz - pz) ** 2
+            if d2 < best_d2:
+                best, best_d2 = index, d2
+            diff = query[axis] - self._points[index][axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            if diff * diff < best_d2:
+                stack.append(far)
+            stack.append(near)
+        return best
+
+
+class Gazetteer:
+    """In-memory place index answering reverse lookups without network access"""
+
+    def __init__(self, places: List[Dict]):
+        self._places: Dict[str, List[Dict]] = {kind: [] for kind in MAX_DISTANCE_M}
+        for place in places:
+            if place.get("kind") in self._places:
+                self._places[place["kind"]].append(place)
+        self._trees = {
+            kind: KDTree([_to_xyz(p["latitude"], p["longitude"]) for p in items])
+            for kind, items in self._places.items() if items
+        }
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._places.values())
+
+    def nearest(self, kind: str, latitude: float, longitude: float) -> Optional[Dict]:
+        tree = self._trees.get(kind)
+        if tree is None:
+            return None
+        index = tree.nearest(_to_xyz(latitude, longitude), _chord(MAX_DISTANCE_M[kind]))
+        return self._places[kind][index] if index is not None else None
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Build a Nominatim-style address dict for the coordinates
+        Returns None when no city is close enough to describe the location
+        """
+        city = self.nearest("city", latitude, longitude)
+        if city is None:
+            return None
+        suburb = self.nearest("suburb", latitude, longitude)
+        road = self.nearest("road", latitude, longitude)
+
+        return {
+            "road": road["name"] if road else None,
+            "suburb": suburb["name"] if suburb else None,
+            "city": city.get("city") or city["name"],
+            "state": city.get("state"),
+            "country": city.get("country"),
+            "postcode": (road or suburb or city).get("postcode"),
+        }
+
+    @classmethod
+    def load(cls, path: str, admin1_path: Optional[str] = None) -> "Gazetteer":
+        """Load a CSV/TSV gazetteer or a GeoNames dump"""
+        with open(path, encoding="utf-8") as f:
+            header = f.readline()
+        if "latitude" in header.lower():
+            return cls(_read_table(path, "\t" if "\t" in header else ","))
+        return cls(_read_geonames(path, admin1_path))
+
+
+def _read_table(path: str, delimiter: str) -> List[Dict]:
+    places = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            try:
+                places.append({
+                    "name": row["name"],
+                    "kind": row["kind"].strip().lower(),
+                    "latitude": float(row["latitude"]),
+                    "longitude": float(row["longitude"]),
+                    "city": row.get("city") or None,
+                    "state": row.get("state") or None,
+                    "country": row.get("country") or None,
+                    "postcode": row.get("postcode") or None,
+                })
+            except (KeyError, ValueError):
+                continue
+    return places
+
+
+def _read_geonames(path: str, admin1_path: Optional[str]) -> List[Dict]:
+    admin1 = {}
+    if admin1_path:
+        with open(admin1_path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) >= 2:
+                    admin1[parts[0]] = parts[1]
+
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 11:
+                continue
+            feature_class, feature_code = cols[6], cols[7]
+            if feature_class == "P":
+                kind = "suburb" if feature_code in _GEONAMES_SUBURB_CODES else "city"
+            elif feature_class == "R" and feature_code in _GEONAMES_ROAD_CODES:
+                kind = "road"
+            else:
+                continue
+            try:
+                latitude, longitude = float(cols[4]), float(cols[5])
+            except ValueError:
+                continue
+            country = cols[8]
+            places.append({
+                "name": cols[1],
+                "kind": kind,
+                "latitude": latitude,
+                "longitude": longitude,
+                "city": None,
+                "state": admin1.get(f"{country}.{cols[10]}", cols[10] or None),
+                "country": country or None,
+                "postcode": None,
+            })
+    return places
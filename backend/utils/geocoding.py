@@ -1,10 +1,23 @@
 """
-Geocoding utilities using OpenStreetMap Nominatim API
+Geocoding utilities using a local gazetteer and/or OpenStreetMap Nominatim API
 Privacy-respecting reverse geocoding without exposing exact addresses
 """
 import httpx
 from typing import Dict, Optional
 import time
+import os
+import importlib.util
+import anyio
+from dotenv import load_dotenv
+from utils import geohash
+from utils.cache import LRUCache, SQLiteCache
+from utils.gazetteer import Gazetteer
+from utils.async_tools import SingleFlight, TokenBucket
+
+load_dotenv()
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
 class GeocodingService:
     """
@@ -15,10 +28,67 @@ class GeocodingService:
     
     BASE_URL = "https://nominatim.openstreetmap.org"
     
+    # Lookups are cached per geohash cell: precision 8 is ~38m x 19m, finer than
+    # the street-level (zoom 16) answers Nominatim gives, so neighbours share an entry
+    CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", 8))
+    CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 30 * 24 * 3600))
+    CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "cache/geocode.sqlite3")
+    
+    _memory_cache = LRUCache(maxsize=int(os.getenv("GEOCODE_CACHE_SIZE", 10000)), ttl=CACHE_TTL)
+    _persistent_cache = SQLiteCache(CACHE_PATH, table="reverse_geocode", ttl=CACHE_TTL) if CACHE_PATH else None
+    _network_lookups = 0
+    
+    # One keep-alive client for the app lifetime, requests coalesced per cell and rate limited
+    NOMINATIM_RATE = float(os.getenv("NOMINATIM_RATE_LIMIT", 1))
+    _client = None
+    _inflight = SingleFlight()
+    _rate_limiter = TokenBucket(rate=NOMINATIM_RATE)
+    
+    # Offline mode: answer from a local gazetteer, Nominatim only as an optional fallback
+    GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "")
+    GAZETTEER_ADMIN1_PATH = os.getenv("GAZETTEER_ADMIN1_PATH", "")
+    ONLINE_FALLBACK = os.getenv("GEOCODER_ONLINE_FALLBACK", "true").lower() == "true"
+    _gazetteer = None
+    _offline_lookups = 0
+    
+    @staticmethod
+    def load_gazetteer() -> None:
+        """Load the local gazetteer (blocking; call once at startup)"""
+        if not GeocodingService.GAZETTEER_PATH:
+            return
+        try:
+            GeocodingService._gazetteer = Gazetteer.load(
+                GeocodingService.GAZETTEER_PATH,
+                GeocodingService.GAZETTEER_ADMIN1_PATH or None
+            )
+            print(f"Loaded {len(GeocodingService._gazetteer)} gazetteer places for offline geocoding")
+        except Exception as e:
+            print(f"Could not load gazetteer: {str(e)}")
+    
+    @staticmethod
+    def get_client() -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if GeocodingService._client is None:
+            GeocodingService._client = httpx.AsyncClient(
+                timeout=10.0,
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120)
+            )
+        return GeocodingService._client
+    
+    @staticmethod
+    async def close_client() -> None:
+        """Close the shared HTTP client (call on shutdown)"""
+        if GeocodingService._client is not None:
+            await GeocodingService._client.aclose()
+            GeocodingService._client = None
+    
     @staticmethod
     async def reverse_geocode(latitude: float, longitude: float) -> Dict[str, Optional[str]]:
         """
         Convert coordinates to privacy-respecting address
+        Served from the local gazetteer when loaded, otherwise from the
+        in-process LRU, then the SQLite cache, then Nominatim
         
         Args:
             latitude: GPS latitude
@@ -27,52 +97,137 @@ class GeocodingService:
         Returns:
             Dictionary with area, city, state, country (no house numbers)
         """
+        if GeocodingService._gazetteer is not None:
+            result = GeocodingService._offline_lookup(latitude, longitude)
+            if result is not None:
+                return result
+            if not GeocodingService.ONLINE_FALLBACK:
+                return GeocodingService._fallback_address(latitude, longitude)
+        
+        key = geohash.encode(latitude, longitude, GeocodingService.CACHE_PRECISION)
+        
+        result = GeocodingService._memory_cache.get(key)
+        if result is not None:
+            return result
+        
+        # Concurrent lookups for the same cell share one persistent-cache read / network call
+        result = await GeocodingService._inflight.do(key, GeocodingService._resolve, key, latitude, longitude)
+        if result is None:
+            return GeocodingService._fallback_address(latitude, longitude)
+        return result
+    
+    @staticmethod
+    async def _resolve(key: str, latitude: float, longitude: float) -> Optional[Dict[str, Optional[str]]]:
+        """Look a cell up in the persistent cache, then Nominatim, filling both caches"""
+        persistent = GeocodingService._persistent_cache
+        if persistent is not None:
+            result = None
+            try:
+                result = await anyio.to_thread.run_sync(persistent.get, key)
+            except Exception as e:
+                print(f"Geocode cache read error: {str(e)}")
+            if result is not None:
+                GeocodingService._memory_cache.set(key, result)
+                return result
+        
+        result = await GeocodingService._fetch_address(latitude, longitude)
+        if result is None:
+            # Don't cache failures - the next request should retry the network
+            return None
+        
+        GeocodingService._memory_cache.set(key, result)
+        if persistent is not None:
+            try:
+                await anyio.to_thread.run_sync(persistent.set, key, result)
+            except Exception as e:
+                print(f"Geocode cache write error: {str(e)}")
+        return result
+    
+    @staticmethod
+    def cache_stats() -> Dict:
+        """Hit/miss counters for each cache tier"""
+        persistent = GeocodingService._persistent_cache
+        return {
+            "memory": GeocodingService._memory_cache.stats(),
+            "persistent": persistent.stats() if persistent is not None else None,
+            "network_lookups": GeocodingService._network_lookups,
+            "offline_lookups": GeocodingService._offline_lookups,
+            "coalescing": GeocodingService._inflight.stats(),
+            "rate_limit_waits": GeocodingService._rate_limiter.waits,
+        }
+    
+    @staticmethod
+    def _offline_lookup(latitude: float, longitude: float) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Resolve coordinates from the local gazetteer
+        Returns None when no nearby city is known
+        """
+        address = GeocodingService._gazetteer.reverse(latitude, longitude)
+        if address is None:
+            return None
+        GeocodingService._offline_lookups += 1
+        display_text = GeocodingService._format_display_address(address)
+        return {
+            **address,
+            "display_text": display_text,
+            "raw_display": ", ".join(part for part in (display_text, address.get("country")) if part)
+        }
+    
+    @staticmethod
+    async def _fetch_address(latitude: float, longitude: float) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Query Nominatim for a privacy-respecting address
+        Returns None when the lookup fails
+        """
+        GeocodingService._network_lookups += 1
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{GeocodingService.BASE_URL}/reverse",
-                    params={
-                        "format": "json",
-                        "lat": latitude,
-                        "lon": longitude,
-                        "zoom": 16,  # Street level zoom without house numbers
-                        "addressdetails": 1
-                    },
-                    headers={
-                        "User-Agent": "CivicReportApp/1.0"  # Required by Nominatim
-                    }
-                )
-                
-                if response.status_code != 200:
-                    return GeocodingService._fallback_address(latitude, longitude)
-                
-                data = response.json()
-                address = data.get("address", {})
-                
-                # Extract privacy-safe address components
-                # We deliberately omit house_number, building, specific addresses
-                result = {
-                    "road": address.get("road"),
-                    "suburb": address.get("suburb") or address.get("neighbourhood") or address.get("quarter"),
-                    "city": (
-                        address.get("city") or 
-                        address.get("town") or 
-                        address.get("village") or
-                        address.get("municipality")
-                    ),
-                    "state": address.get("state"),
-                    "country": address.get("country"),
-                    "postcode": address.get("postcode"),
-                    # Generate display-friendly text
-                    "display_text": GeocodingService._format_display_address(address),
-                    "raw_display": data.get("display_name")  # Full name for reference
+            # Wait for a Nominatim slot (1 req/s policy) rather than failing
+            await GeocodingService._rate_limiter.acquire()
+            client = GeocodingService.get_client()
+            response = await client.get(
+                f"{GeocodingService.BASE_URL}/reverse",
+                params={
+                    "format": "json",
+                    "lat": latitude,
+                    "lon": longitude,
+                    "zoom": 16,  # Street level zoom without house numbers
+                    "addressdetails": 1
+                },
+                headers={
+                    "User-Agent": "CivicReportApp/1.0"  # Required by Nominatim
                 }
-                
-                return result
-                
+            )
+            
+            if response.status_code != 200:
+                return None
+            
+            data = response.json()
+            address = data.get("address", {})
+            
+            # Extract privacy-safe address components
+            # We deliberately omit house_number, building, specific addresses
+            result = {
+                "road": address.get("road"),
+                "suburb": address.get("suburb") or address.get("neighbourhood") or address.get("quarter"),
+                "city": (
+                    address.get("city") or 
+                    address.get("town") or 
+                    address.get("village") or
+                    address.get("municipality")
+                ),
+                "state": address.get("state"),
+                "country": address.get("country"),
+                "postcode": address.get("postcode"),
+                # Generate display-friendly text
+                "display_text": GeocodingService._format_display_address(address),
+                "raw_display": data.get("display_name")  # Full name for reference
+            }
+            
+            return result
+            
         except Exception as e:
             print(f"Geocoding error: {str(e)}")
-            return GeocodingService._fallback_address(latitude, longitude)
+            return None
     
     @staticmethod
     def _format_display_address(address: dict) -> str:
@@ -0,0 +1,95 @@
+"""
+Geohash encoding and bounding-box cover
+A geohash turns a lat/lon into a string whose prefixes are nested grid cells,
+so "reports near here" becomes a handful of B-tree prefix range scans
+"""
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+EARTH_RADIUS_M = 6371000
+METERS_PER_DEGREE_LAT = 111320
+
+# Precision stored in reports.geohash (~3.7cm x 1.9cm cells)
+MAX_PRECISION = 12
+
+
+def encode(latitude: float, longitude: float, precision: int = MAX_PRECISION) -> str:
+    """Encode coordinates as a geohash string of the given length"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return (lat_degrees, lon_degrees) covered by one cell at a precision"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def cover(min_lat: float, min_lon: float, max_lat: float, max_lon: float, max_cells: int = 16) -> List[str]:
+    """
+    Return geohash prefixes whose cells together contain the bounding box
+    Uses the longest precision that needs at most max_cells prefixes
+    """
+    for precision in range(MAX_PRECISION, 0, -1):
+        lat_step, lon_step = cell_size(precision)
+        rows = math.floor((max_lat + 90) / lat_step) - math.floor((min_lat + 90) / lat_step) + 1
+        cols = math.floor((max_lon + 180) / lon_step) - math.floor((min_lon + 180) / lon_step) + 1
+        if rows * cols <= max_cells:
+            break
+
+    prefixes = set()
+    lat_start = math.floor((min_lat + 90) / lat_step) * lat_step - 90
+    lon_start = math.floor((min_lon + 180) / lon_step) * lon_step - 180
+    for row in range(rows):
+        lat = min(lat_start + (row + 0.5) * lat_step, 90.0)
+        for col in range(cols):
+            lon = min(lon_start + (col + 0.5) * lon_step, 180.0)
+            prefixes.add(encode(lat, lon, precision))
+    return sorted(prefixes)
+
+
+def radius_bbox(latitude: float, longitude: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """Return (min_lat, min_lon, max_lat, max_lon) enclosing a circle"""
+    lat_delta = radius_m / METERS_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lon_delta = min(radius_m / (METERS_PER_DEGREE_LAT * cos_lat), 180.0)
+    return (
+        max(latitude - lat_delta, -90.0),
+        max(longitude - lon_delta, -180.0),
+        min(latitude + lat_delta, 90.0),
+        min(longitude + lon_delta, 180.0),
+    )
+
+
+def haversine_sql(lat_column: str = "latitude", lon_column: str = "longitude") -> str:
+    """SQL expression for great-circle distance in meters; binds (lat, lat, lon)"""
+    return (
+        f"{EARTH_RADIUS_M} * 2 * ASIN(SQRT("
+        f"POWER(SIN(RADIANS({lat_column} - %s) / 2), 2) + "
+        f"COS(RADIANS(%s)) * COS(RADIANS({lat_column})) * "
+        f"POWER(SIN(RADIANS({lon_column} - %s) / 2), 2)))"
+    )
@@ -1,31 +1,89 @@
 """
-Image Classification Service - TEMPORARILY DISABLED
-Hugging Face Free Inference API was deprecated in January 2026 (HTTP 410 Gone)
-Classification feature temporarily disabled until free alternative is found
+Image Classification Service - local CPU inference
+Runs a small ImageNet-style ONNX model (e.g. MobileNetV2 / EfficientNet-Lite,
+ideally int8-quantized) in-process with onnxruntime, so no paid or rate-limited
+API is involved. Model labels are mapped onto civic categories via CATEGORY_MAPPING.
+The Hugging Face free inference API this used to call was shut down in January 2026.
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
+import io
 import os
+import re
+import time
+import asyncio
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import anyio
 from dotenv import load_dotenv
+from utils.micro_batcher import MicroBatcher, QueueFullError
+from utils.cache import LRUCache, SQLiteCache
+from utils.async_tools import SingleFlight
 
 load_dotenv()
 
+# Optional dependencies: without them classification falls back to manual selection
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from PIL import Image, ImageOps
+except ImportError:
+    ort = None
+
 class ImageClassificationService:
     """
-    Image classification temporarily disabled
+    Offline image classification on the CPU
+    - Model and labels are loaded once at startup (load_model)
+    - Concurrent requests are micro-batched and run on a process pool
+      (or on a worker thread when CLASSIFIER_WORKERS=0)
+    - Falls back to manual category selection when no model is configured
+      (CLASSIFIER_MODEL_PATH empty); a configured model that can't be loaded stops startup
+    """
     
-    REASON: Hugging Face free inference API discontinued as of January 2026
-    All requests to api-inference.huggingface.co return HTTP 410 Gone
+    # ONNX image classifier and its labels (one per line, ImageNet synset lines accepted)
+    MODEL_PATH = os.getenv("CLASSIFIER_MODEL_PATH", "")
+    LABELS_PATH = os.getenv("CLASSIFIER_LABELS_PATH", "")
+    # Threads per inference; 1 keeps latency predictable and leaves cores for requests
+    THREADS = int(os.getenv("CLASSIFIER_THREADS", 1))
+    # Below this confidence the report is flagged for manual review
+    MIN_CONFIDENCE = float(os.getenv("CLASSIFIER_MIN_CONFIDENCE", 0.35))
+    # Model labels considered when voting for a category
+    TOP_K = 5
     
-    Returns fallback response for all classification requests
-    until a free alternative API is implemented
-    """
+    # Micro-batching: a batch is cut at BATCH_SIZE images or BATCH_WAIT_MS after its first one;
+    # beyond MAX_QUEUE waiting images new requests get 503 instead of ever-growing latency
+    WORKERS = int(os.getenv("CLASSIFIER_WORKERS", 1))
+    BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", 16))
+    BATCH_WAIT_MS = float(os.getenv("CLASSIFIER_BATCH_WAIT_MS", 20))
+    MAX_QUEUE = int(os.getenv("CLASSIFIER_MAX_QUEUE", 64))
+    
+    # Standard ImageNet preprocessing: resize shorter side, center crop, normalize
+    RESIZE_SIZE = 256
+    CROP_SIZE = 224
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
     
-    # DEPRECATED: Hugging Face API shut down (HTTP 410 as of Jan 2026)
-    # Recommended migration: https://router.huggingface.co (PAID service only)
-    API_URL = None  # Disabled - no free alternative found yet
-    HF_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN", "")
+    _session = None
+    _input_name = None
+    _channels_first = True
+    _fixed_batch = None
+    _labels: List[str] = []
+    _label_categories: List[Optional[str]] = []
+    _inferences = 0
+    _inference_ms = 0.0
+    _ready = False
+    _executor = None
+    _batcher = None
     
-    # Category mapping preserved for future use when free API is found
+    # Results memoized by image SHA-256 (plus model version); identical concurrent requests share one run
+    CACHE_PATH = os.getenv("CLASSIFIER_CACHE_PATH", "cache/classification.sqlite3")
+    _memory_cache = LRUCache(maxsize=int(os.getenv("CLASSIFIER_CACHE_SIZE", 5000)))
+    _persistent_cache = SQLiteCache(CACHE_PATH, table="image_classification") if CACHE_PATH else None
+    _model_version = ""
+    _inflight = SingleFlight()
+    
+    # Model label keywords -> civic problem category
     CATEGORY_MAPPING = {
         # Garbage/Waste related
         "trash can": "Garbage on Open Spaces",
@@ -72,20 +130,301 @@ class ImageClassificationService:
         "traffic": "Accident Spot"
     }
     
+    @staticmethod
+    def check_config() -> bool:
+        """
+        False when no model is configured (classification disabled)
+        Raises RuntimeError when CLASSIFIER_MODEL_PATH is set but can't be used
+        """
+        service = ImageClassificationService
+        if not service.MODEL_PATH:
+            print("ℹ️  Image classifier disabled: set CLASSIFIER_MODEL_PATH and CLASSIFIER_LABELS_PATH to enable it")
+            return False
+        if ort is None:
+            raise RuntimeError("CLASSIFIER_MODEL_PATH is set but onnxruntime, numpy or Pillow is not installed")
+        for name, path in (("CLASSIFIER_MODEL_PATH", service.MODEL_PATH), ("CLASSIFIER_LABELS_PATH", service.LABELS_PATH)):
+            if not path or not os.path.isfile(path):
+                raise RuntimeError(f"{name} does not point to a file: {path!r}")
+        return True
+    
+    @staticmethod
+    def load_model() -> None:
+        """Load the ONNX model and labels (blocking; call once at startup, after check_config)"""
+        try:
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = ImageClassificationService.THREADS
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(
+                ImageClassificationService.MODEL_PATH, options, providers=["CPUExecutionProvider"]
+            )
+            labels = ImageClassificationService._read_labels(ImageClassificationService.LABELS_PATH)
+            
+            model_input = session.get_inputs()[0]
+            ImageClassificationService._input_name = model_input.name
+            # NCHW models have the 3 colour channels in dimension 1, NHWC ones last
+            ImageClassificationService._channels_first = model_input.shape[1] == 3
+            # Models exported with a fixed batch dimension of 1 are run image by image
+            batch_dim = model_input.shape[0]
+            ImageClassificationService._fixed_batch = batch_dim if isinstance(batch_dim, int) else None
+            ImageClassificationService._labels = labels
+            # Map every label once so inference only does a list lookup
+            ImageClassificationService._label_categories = [
+                ImageClassificationService._category_for_label(label) for label in labels
+            ]
+            ImageClassificationService._session = session
+            print(f"✅ Image classifier loaded: {ImageClassificationService.MODEL_PATH} ({len(labels)} labels)")
+        except Exception as e:
+            raise RuntimeError(f"Could not load image classifier {ImageClassificationService.MODEL_PATH}: {e}") from e
+    
+    @staticmethod
+    def is_available() -> bool:
+        return ImageClassificationService._ready
+    
+    @staticmethod
+    def _worker_ready() -> bool:
+        # Runs inside a pool process after load_model() was its initializer
+        return ImageClassificationService._session is not None
+    
+    @staticmethod
+    async def start() -> None:
+        """
+        Load the model (in each worker process, or here) and start the batch scheduler
+        Raises RuntimeError when a configured model can't be loaded, so startup fails
+        """
+        service = ImageClassificationService
+        if not service.check_config():
+            return
+        if service.WORKERS > 0:
+            # Spawned workers: a fork would copy onnxruntime's thread pools in a broken state
+            service._executor = ProcessPoolExecutor(
+                max_workers=service.WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=service.load_model,
+            )
+            # Wait for the workers to load the model so the first requests don't pay for it
+            loop = asyncio.get_running_loop()
+            try:
+                ready = await asyncio.gather(*[
+                    loop.run_in_executor(service._executor, service._worker_ready) for _ in range(service.WORKERS)
+                ])
+            except BrokenProcessPool as e:
+                # The initializer raised in a worker; its traceback is printed by that process
+                await service.stop()
+                raise RuntimeError(f"Could not load image classifier {service.MODEL_PATH} in worker processes") from e
+            service._ready = all(ready)
+            if service._ready:
+                service._labels = service._read_labels(service.LABELS_PATH)
+        else:
+            await anyio.to_thread.run_sync(service.load_model)
+            service._ready = service._worker_ready()
+        if not service._ready:
+            await service.stop()
+            raise RuntimeError(f"Image classifier {service.MODEL_PATH} did not load")
+        # Cached results are only reused while the same model file is deployed
+        model_stat = os.stat(service.MODEL_PATH)
+        service._model_version = hashlib.sha256(
+            f"{os.path.abspath(service.MODEL_PATH)}:{model_stat.st_size}:{model_stat.st_mtime_ns}".encode()
+        ).hexdigest()[:12]
+        service._batcher = MicroBatcher(
+            service.classify_batch,
+            max_batch_size=service.BATCH_SIZE,
+            max_wait_ms=service.BATCH_WAIT_MS,
+            max_queue=service.MAX_QUEUE,
+            max_concurrent_batches=max(1, service.WORKERS),
+            executor=service._executor,
+        )
+        service._batcher.start()
+    
+    @staticmethod
+    async def stop() -> None:
+        service = ImageClassificationService
+        service._ready = False
+        if service._batcher is not None:
+            await service._batcher.stop()
+            service._batcher = None
+        if service._executor is not None:
+            service._executor.shutdown(wait=False, cancel_futures=True)
+            service._executor = None
+        if service._persistent_cache is not None:
+            service._persistent_cache.close()
+    
+    @staticmethod
+    def _read_labels(path: str) -> List[str]:
+        labels = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                # "n01440764 tench, Tinca tinca" -> "tench, Tinca tinca"
+                labels.append(re.sub(r"^n\d{8}\s+", "", line))
+        return labels
+    
+    @staticmethod
+    def _category_for_label(label: str) -> Optional[str]:
+        """
+        Category of a model label, using the longest CATEGORY_MAPPING keyword
+        found as whole words (so "street light" beats "light", and "sign" never matches "signal")
+        """
+        text = label.lower()
+        best = None
+        for keyword, category in ImageClassificationService.CATEGORY_MAPPING.items():
+            if re.search(rf"\b{re.escape(keyword)}\b", text) and (best is None or len(keyword) > len(best[0])):
+                best = (keyword, category)
+        return best[1] if best else None
+    
+    @staticmethod
+    def preprocess(image_bytes: bytes):
+        """Decode an image into a normalized 1x3x224x224 (or NHWC) float32 tensor"""
+        service = ImageClassificationService
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            # JPEG can decode straight at a reduced scale - most of the decode cost saved
+            img.draft("RGB", (service.RESIZE_SIZE, service.RESIZE_SIZE))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+        scale = service.RESIZE_SIZE / min(img.size)
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.BILINEAR)
+        left = (img.width - service.CROP_SIZE) // 2
+        top = (img.height - service.CROP_SIZE) // 2
+        img = img.crop((left, top, left + service.CROP_SIZE, top + service.CROP_SIZE))
+        
+        pixels = np.asarray(img, dtype=np.float32) / 255.0
+        pixels = (pixels - np.array(service.MEAN, dtype=np.float32)) / np.array(service.STD, dtype=np.float32)
+        if service._channels_first:
+            pixels = pixels.transpose(2, 0, 1)
+        return pixels[np.newaxis]
+    
+    @staticmethod
+    def predict(batch) -> "np.ndarray":
+        """Class probabilities for a preprocessed batch (one row per image)"""
+        service = ImageClassificationService
+        logits = service._session.run(None, {service._input_name: batch})[0]
+        logits = logits.reshape(logits.shape[0], -1).astype(np.float32)
+        # Some exported models end in softmax already; only normalize raw logits
+        if np.all(logits >= 0) and np.allclose(logits.sum(axis=1), 1.0, atol=1e-3):
+            return logits
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+    
+    @staticmethod
+    def build_result(probabilities) -> Dict:
+        """Turn one row of class probabilities into the classification response"""
+        service = ImageClassificationService
+        top_k = min(service.TOP_K, probabilities.shape[0])
+        top = np.argpartition(probabilities, -top_k)[-top_k:]
+        top = top[np.argsort(probabilities[top])[::-1]]
+        
+        predictions = []
+        category_scores: Dict[str, float] = {}
+        for index in top:
+            label = service._labels[index] if index < len(service._labels) else str(index)
+            category = service._label_categories[index] if index < len(service._label_categories) else None
+            score = float(probabilities[index])
+            predictions.append({"label": label, "score": round(score, 4), "category": category})
+            if category:
+                category_scores[category] = category_scores.get(category, 0.0) + score
+        
+        if not category_scores:
+            return {
+                "predicted_category": "Other",
+                "confidence": 0.0,
+                "all_predictions": predictions,
+                "should_manual_review": True,
+                "message": "Could not recognise a civic issue in this photo. Please select category manually."
+            }
+        
+        category, confidence = max(category_scores.items(), key=lambda item: item[1])
+        manual_review = confidence < service.MIN_CONFIDENCE
+        return {
+            "predicted_category": category,
+            "confidence": round(confidence, 4),
+            "all_predictions": predictions,
+            "should_manual_review": manual_review,
+            "message": "Low confidence - please confirm the category." if manual_review else "Category suggested automatically."
+        }
+    
+    @staticmethod
+    def classify_batch(images: List[bytes]) -> List[Dict]:
+        """
+        Classify a batch of images with one model call (runs in a pool worker)
+        Images that cannot be decoded get the fallback response instead of failing the batch
+        """
+        service = ImageClassificationService
+        started = time.perf_counter()
+        tensors, positions = [], []
+        results: List[Optional[Dict]] = [None] * len(images)
+        for position, image_bytes in enumerate(images):
+            try:
+                tensors.append(service.preprocess(image_bytes))
+                positions.append(position)
+            except Exception as e:
+                result = service._fallback_response()
+                result["message"] = f"Could not read image ({e}). Please select category manually."
+                results[position] = result
+        
+        if tensors:
+            if service._fixed_batch == 1:
+                probabilities = np.concatenate([service.predict(tensor) for tensor in tensors])
+            else:
+                probabilities = service.predict(np.concatenate(tensors))
+            for position, row in zip(positions, probabilities):
+                results[position] = service.build_result(row)
+        
+        # Batch cost shared across its images
+        per_image_ms = round((time.perf_counter() - started) * 1000 / len(images), 1)
+        for result in results:
+            result["inference_ms"] = per_image_ms
+        return results
+    
     @staticmethod
     async def classify_image(image_bytes: bytes) -> Dict:
         """
-        Classification temporarily disabled due to API deprecation
+        Suggest a category for a report photo
         
         Args:
-            image_bytes: Raw image bytes (not processed)
-            
+            image_bytes: Raw image bytes (JPEG, PNG, WebP, ...)
+        
         Returns:
-            Fallback response directing users to manual category selection
+            Predicted category, confidence, top model labels and whether an
+            admin should review the category manually
         """
-        print("⚠️  Image classification disabled: Hugging Face Free API deprecated (HTTP 410)")
-        print("📝 User must select category manually until free alternative is found")
-        return ImageClassificationService._fallback_response()
+        service = ImageClassificationService
+        if not service.is_available():
+            return service._fallback_response()
+        
+        # Same bytes (retries, classify-then-upload) -> same answer without inference
+        key = f"{service._model_version}:{hashlib.sha256(image_bytes).hexdigest()}"
+        result = service._memory_cache.get(key)
+        if result is not None:
+            return {**result, "cached": True}
+        return await service._inflight.do(key, service._classify_uncached, key, image_bytes)
+    
+    @staticmethod
+    async def _classify_uncached(key: str, image_bytes: bytes) -> Dict:
+        service = ImageClassificationService
+        persistent = service._persistent_cache
+        if persistent is not None:
+            result = None
+            try:
+                result = await anyio.to_thread.run_sync(persistent.get, key)
+            except Exception as e:
+                print(f"Classification cache read error: {str(e)}")
+            if result is not None:
+                service._memory_cache.set(key, result)
+                return {**result, "cached": True}
+        
+        # Raises QueueFullError when the scheduler is saturated
+        result = await service._batcher.submit(image_bytes)
+        service._inferences += 1
+        service._inference_ms += result.get("inference_ms", 0.0)
+        
+        # Undecodable images get the fallback (confidence 0, no predictions) - don't remember those
+        if result["all_predictions"]:
+            service._memory_cache.set(key, result)
+            if persistent is not None:
+                try:
+                    await anyio.to_thread.run_sync(persistent.set, key, result)
+                except Exception as e:
+                    print(f"Classification cache write error: {str(e)}")
+        return {**result, "cached": False}
     
     @staticmethod
     def _fallback_response() -> Dict:
@@ -97,7 +436,35 @@ class ImageClassificationService:
             "confidence": 0.0,
             "all_predictions": [],
             "should_manual_review": True,
-            "message": "AI classification temporarily unavailable - Hugging Face API deprecated. Please select category manually."
+            "message": "AI classification unavailable - no classifier model configured. Please select category manually."
+        }
+    
+    @staticmethod
+    def _cache_hit_rate() -> float:
+        service = ImageClassificationService
+        memory = service._memory_cache
+        lookups = memory.hits + memory.misses
+        persistent_hits = service._persistent_cache.hits if service._persistent_cache is not None else 0
+        return round((memory.hits + persistent_hits) / lookups, 4) if lookups else 0.0
+    
+    @staticmethod
+    def stats() -> Dict:
+        service = ImageClassificationService
+        return {
+            "available": service.is_available(),
+            "model": service.MODEL_PATH or None,
+            "labels": len(service._labels),
+            "inferences": service._inferences,
+            "avg_inference_ms": round(service._inference_ms / service._inferences, 1) if service._inferences else 0.0,
+            "workers": service.WORKERS,
+            "batching": service._batcher.stats() if service._batcher else None,
+            "cache": {
+                # Share of classify requests answered without running the model
+                "hit_rate": service._cache_hit_rate(),
+                "memory": service._memory_cache.stats(),
+                "persistent": service._persistent_cache.stats() if service._persistent_cache is not None else None,
+                "coalesced": service._inflight.stats(),
+            },
         }
     
     @staticmethod
@@ -0,0 +1,216 @@
+"""
+Resized, metadata-free copies of uploaded images for list and detail views
+Derivatives are written next to the original as <sha256>.<variant>.<format>,
+so their URLs follow from the original's URL and they are removed with it.
+Generation runs in a process pool (Pillow work is CPU-bound and holds the GIL).
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from utils.blob_store import digest_from_url
+
+load_dotenv()
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it no derivatives are made
+    Image = None
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF plugin with Pillow
+except ImportError:
+    pass
+
+# Longest side in pixels for each variant
+VARIANT_SIZES = {
+    "thumb": 320,
+    "medium": 1280,
+}
+
+# Source formats worth resizing; only those the installed Pillow can open are used
+# (HEIC needs pillow-heif and AVIF needs pillow-avif-plugin, neither is required)
+RESIZABLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff", ".heic", ".avif"}
+
+# Same directory routes/uploads.py stores and serves files from
+UPLOAD_ROOT = Path("uploads")
+
+# Refuse to decode images larger than this (decompression-bomb guard)
+MAX_SOURCE_PIXELS = 80_000_000
+
+_SAVE_OPTIONS = {
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    "webp": {"format": "WEBP", "quality": 78, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60, "speed": 8},
+}
+
+# Metadata keys dropped from every derivative (EXIF carries GPS coordinates)
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "photoshop", "comment")
+
+PILLOW_AVAILABLE = Image is not None
+AVIF_SUPPORTED = PILLOW_AVAILABLE and ".avif" in Image.registered_extensions()
+OUTPUT_FORMATS = ["jpg", "webp"] + (["avif"] if AVIF_SUPPORTED else [])
+IMAGE_EXTENSIONS = {
+    ext for ext, fmt in Image.registered_extensions().items()
+    if ext in RESIZABLE_EXTENSIONS and fmt in Image.OPEN
+} if PILLOW_AVAILABLE else set()
+
+
+def is_image(path_or_url: str) -> bool:
+    return os.path.splitext(path_or_url)[1].lower() in IMAGE_EXTENSIONS
+
+
+def derivative_name(digest: str, variant: str, fmt: str) -> str:
+    return f"{digest}.{variant}.{fmt}"
+
+
+def derivative_urls(image_url: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    URLs of the derivatives of a content-addressed image that exist on disk, e.g.
+    {"thumb": ".../<sha>.thumb.jpg", "thumb_webp": ..., "medium": ..., "medium_webp": ...}
+    Returns None for other URLs and while none have been generated (or generation
+    failed); clients then fall back to image_url.
+    """
+    digest = digest_from_url(image_url)
+    if digest is None or not is_image(image_url) or not PILLOW_AVAILABLE:
+        return None
+    # One directory listing per image instead of a stat per variant
+    try:
+        stored = set(os.listdir(UPLOAD_ROOT / digest[:2] / digest[2:4]))
+    except OSError:
+        return None
+    base = image_url.rsplit("/", 1)[0]
+    urls = {}
+    for variant in VARIANT_SIZES:
+        for fmt in OUTPUT_FORMATS:
+            name = derivative_name(digest, variant, fmt)
+            if name in stored:
+                key = variant if fmt == "jpg" else f"{variant}_{fmt}"
+                urls[key] = f"{base}/{name}"
+    return urls or None
+
+
+def with_derivative_urls(rows: List[Dict]) -> List[Dict]:
+    """Add image_derivatives to raw report rows (for listings without a response_model)"""
+    for row in rows:
+        row['image_derivatives'] = derivative_urls(row.get('image_url'))
+    return rows
+
+
+def generate_derivatives(source: str) -> List[str]:
+    """
+    Write every missing derivative of an image; returns the files created
+    Runs in a worker process. EXIF (including GPS) and XMP are stripped before
+    every save, after the orientation tag has been applied to the pixels.
+    """
+    source_path = Path(source)
+    digest = source_path.name.split(".", 1)[0]
+    targets = {
+        (variant, fmt): source_path.with_name(derivative_name(digest, variant, fmt))
+        for variant in VARIANT_SIZES for fmt in OUTPUT_FORMATS
+    }
+    missing = {key: path for key, path in targets.items() if not path.exists()}
+    if not missing:
+        return []
+
+    Image.MAX_IMAGE_PIXELS = MAX_SOURCE_PIXELS
+    created = []
+    with Image.open(source_path) as img:
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale, far cheaper than a full decode
+        largest = max(VARIANT_SIZES[variant] for variant, _ in missing)
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        # Largest first so each smaller variant is resized from the previous one
+        for variant in sorted(VARIANT_SIZES, key=VARIANT_SIZES.get, reverse=True):
+            size = VARIANT_SIZES[variant]
+            if max(img.size) > size:
+                img = _resized(img, size)
+            for fmt in OUTPUT_FORMATS:
+                path = missing.get((variant, fmt))
+                if path is None:
+                    continue
+                out = img.convert("RGB") if fmt == "jpg" and img.mode != "RGB" else img
+                # Write then rename so the static file server never sees a partial file
+                temp_path = path.with_name(f".{path.name}.part")
+                _strip_metadata(out)
+                out.save(temp_path, exif=b"", **_SAVE_OPTIONS[fmt])
+                os.replace(temp_path, path)
+                created.append(str(path))
+    return created
+
+
+def _strip_metadata(img) -> None:
+    # Some encoders copy img.info into the output when no value is passed to save()
+    for key in METADATA_KEYS:
+        img.info.pop(key, None)
+
+
+def _resized(img, size: int):
+    resized = img.copy()
+    resized.thumbnail((size, size), Image.LANCZOS)
+    return resized
+
+
+class DerivativeService:
+    """Schedules derivative generation in a background process pool"""
+
+    WORKERS = int(os.getenv("IMAGE_DERIVATIVE_WORKERS", max(1, min(2, (os.cpu_count() or 1) - 1))))
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _pending = 0
+    _completed = 0
+    _failed = 0
+
+    @staticmethod
+    def _get_executor() -> ProcessPoolExecutor:
+        if DerivativeService._executor is None:
+            DerivativeService._executor = ProcessPoolExecutor(max_workers=DerivativeService.WORKERS)
+        return DerivativeService._executor
+
+    @staticmethod
+    def schedule(path: Path) -> bool:
+        """
+        Queue derivative generation for an uploaded image without waiting for it
+        Returns False when the file is not an image or Pillow is missing
+        """
+        if not PILLOW_AVAILABLE or not is_image(str(path)):
+            return False
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(DerivativeService._get_executor(), generate_derivatives, str(path))
+        DerivativeService._pending += 1
+        future.add_done_callback(lambda f: DerivativeService._finish(path, f))
+        return True
+
+    @staticmethod
+    def _finish(path: Path, future: asyncio.Future) -> None:
+        DerivativeService._pending -= 1
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            DerivativeService._failed += 1
+            print(f"Derivative generation failed for {path.name}: {error}")
+        else:
+            DerivativeService._completed += 1
+
+    @staticmethod
+    def shutdown() -> None:
+        if DerivativeService._executor is not None:
+            DerivativeService._executor.shutdown(wait=False, cancel_futures=True)
+            DerivativeService._executor = None
+
+    @staticmethod
+    def stats() -> Dict:
+        return {
+            "pillow_available": PILLOW_AVAILABLE,
+            "formats": OUTPUT_FORMATS if PILLOW_AVAILABLE else [],
+            "workers": DerivativeService.WORKERS,
+            "pending": DerivativeService._pending,
+            "completed": DerivativeService._completed,
+            "failed": DerivativeService._failed,
+        }
@@ -0,0 +1,173 @@
+"""
+Hot-reloadable chatbot knowledge base
+Ideas live in a JSONL file (one JSON object per line) and are compiled into a
+KnowledgeSnapshot: the idea list plus its BM25 index. A watcher polls the file's
+mtime and size; on change the file is re-read on a worker thread and the new
+snapshot replaces the old one in a single assignment, so in-flight queries keep
+searching the snapshot they started with. Lines whose text did not change reuse
+their parsed idea and term counts, so a reload only tokenizes edited lines.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+import anyio
+from utils.text_index import InvertedIndex
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    ideas: List[Dict[str, Any]]
+    index: InvertedIndex
+    version: int
+    modified_at: float = 0.0
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+class KnowledgeBase:
+    """
+    JSONL-backed idea store with an atomically swapped search index
+    fields_of(idea) returns the text fields weighted by field_weights
+    """
+
+    def __init__(
+        self,
+        path: str,
+        field_weights: Mapping[str, float],
+        fields_of: Callable[[Dict[str, Any]], Dict[str, str]],
+        poll_interval: float = 2.0,
+    ):
+        self.path = path
+        self.field_weights = dict(field_weights)
+        self.fields_of = fields_of
+        self.poll_interval = poll_interval
+        self._snapshot: Optional[KnowledgeSnapshot] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        # line hash -> (idea, term counts); reused across reloads for unchanged lines
+        self._compiled: Dict[bytes, Tuple[Dict[str, Any], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[KnowledgeSnapshot], None]] = []
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        """Current snapshot (loaded on first use if startup hasn't done it yet)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.reload()
+            snapshot = self._snapshot
+        return snapshot
+
+    def on_change(self, listener: Callable[[KnowledgeSnapshot], None]) -> None:
+        """Call listener(snapshot) after every reload (e.g. to drop cached answers)"""
+        self._listeners.append(listener)
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat_result = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-read the file if it changed since the last load (blocking)
+        Returns True when a new snapshot was installed
+        """
+        with self._lock:
+            signature = self._file_signature()
+            if not force and self._snapshot is not None and signature == self._signature:
+                return False
+
+            lines = []
+            if signature is not None:
+                with open(self.path, "rb") as f:
+                    lines = f.read().splitlines()
+            elif self._snapshot is None:
+                print(f"Knowledge base file not found: {self.path}")
+
+            ideas, index, stats = self._compile(lines)
+            snapshot = KnowledgeSnapshot(
+                ideas=ideas,
+                index=index,
+                version=(self._snapshot.version + 1) if self._snapshot else 1,
+                modified_at=signature[0] / 1e9 if signature else 0.0,
+                stats=stats,
+            )
+            # Single reference swap; readers never see a half-built index
+            self._snapshot = snapshot
+            self._signature = signature
+            self.reloads += 1
+
+        for listener in self._listeners:
+            listener(snapshot)
+        return True
+
+    def _compile(self, lines: List[bytes]):
+        compiled: Dict[bytes, Tuple[Dict[str, Any], Dict[str, float]]] = {}
+        index = InvertedIndex(self.field_weights)
+        ideas: List[Dict[str, Any]] = []
+        reused = parsed = skipped = 0
+
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith(b"#"):
+                continue
+            key = hashlib.blake2b(line, digest_size=16).digest()
+            entry = compiled.get(key) or self._compiled.get(key)
+            if entry is not None:
+                reused += 1
+            else:
+                try:
+                    idea = json.loads(line)
+                    entry = (idea, index.term_frequencies(self.fields_of(idea)))
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Skipping knowledge base line {number}: {e}")
+                    skipped += 1
+                    continue
+                parsed += 1
+            compiled[key] = entry
+            ideas.append(entry[0])
+            index.add_counts(entry[1])
+
+        # Drop entries for lines that no longer exist
+        self._compiled = compiled
+        return ideas, index.finalize(), {"ideas": len(ideas), "reused": reused, "parsed": parsed, "skipped": skipped}
+
+    async def load(self) -> None:
+        await anyio.to_thread.run_sync(self.reload)
+
+    def start_watching(self) -> None:
+        if self._watcher is None and self.poll_interval > 0:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                # The stat is cheap; parsing and indexing only happen on a worker thread after a change
+                if self._file_signature() != self._signature:
+                    if await anyio.to_thread.run_sync(self.reload):
+                        print(f"Knowledge base reloaded: {self._snapshot.stats}")
+            except Exception as e:
+                print(f"Knowledge base reload failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "path": os.path.abspath(self.path),
+            "version": snapshot.version if snapshot else 0,
+            "reloads": self.reloads,
+            "vocabulary": snapshot.index.vocabulary_size if snapshot else 0,
+            **(snapshot.stats if snapshot else {}),
+        }
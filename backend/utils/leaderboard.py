@@ -0,0 +1,350 @@
+"""
+In-memory citizen leaderboard
+Active citizens are kept in an indexable skip list ordered by points (then id),
+seeded from the users table at startup and updated as points are awarded, so
+top-N, a user's rank and the users around them are O(log n) lookups instead of
+re-sorting every citizen in the leaderboard view on each request.
+
+Weekly, monthly and per-city boards come from points_rollups (schema_v6):
+every award is written to points_ledger and added to one rollup row per
+(period, bucket start, city scope) in the same transaction, so ranking a city
+for the week reads one small bucket. Buckets are calendar aligned, so a new
+week simply starts a new bucket and old ones are purged by a scheduled event.
+"""
+import random
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import anyio
+from database import async_db, db
+
+BADGE_SQL = """CASE
+               WHEN points + %s >= 500 THEN 'platinum'
+               WHEN points + %s >= 300 THEN 'gold'
+               WHEN points + %s >= 200 THEN 'silver'
+               WHEN points + %s >= 100 THEN 'bronze'
+               ELSE 'citizen'
+           END"""
+
+LEADERBOARD_FIELDS = ("id", "name", "email", "points", "badge", "reports_submitted", "created_at")
+SEED_QUERY = f"""
+    SELECT {", ".join(LEADERBOARD_FIELDS)}, role, status
+    FROM users
+    WHERE role = 'citizen' AND status = 'active'
+"""
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        # width[i] = how many positions next[i] jumps ahead (unused while next[i] is None)
+        self.width: List[int] = [0] * level
+
+
+class RankedSkipList:
+    """
+    Sorted set of unique, comparable keys with positional access
+    insert/remove/count_less are O(log n) expected, slice is O(log n + k)
+    """
+    MAX_LEVEL = 32
+
+    def __init__(self):
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_sorted(cls, keys: List[Any]) -> "RankedSkipList":
+        """Build in O(n) from keys already in ascending order without duplicates"""
+        skiplist = cls()
+        tails = [skiplist._head] * cls.MAX_LEVEL
+        tail_positions = [0] * cls.MAX_LEVEL
+        for position, key in enumerate(keys, start=1):
+            level = skiplist._random_level()
+            node = _Node(key, level)
+            for i in range(level):
+                tails[i].next[i] = node
+                tails[i].width[i] = position - tail_positions[i]
+                tails[i], tail_positions[i] = node, position
+            skiplist._level = max(skiplist._level, level)
+        skiplist._size = len(keys)
+        return skiplist
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find(self, key) -> Tuple[List[_Node], List[int]]:
+        """Last node before key on every level, and its position (head = 0)"""
+        update = [self._head] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node, position = self._head, 0
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                position += node.width[i]
+                node = node.next[i]
+            update[i], positions[i] = node, position
+        return update, positions
+
+    def insert(self, key) -> None:
+        update, positions = self._find(key)
+        following = update[0].next[0]
+        if following is not None and following.key == key:
+            return
+        position = positions[0] + 1
+        level = self._random_level()
+        if level > self._level:
+            self._level = level
+        node = _Node(key, level)
+        for i in range(level):
+            before = update[i]
+            node.next[i] = before.next[i]
+            if node.next[i] is not None:
+                node.width[i] = positions[i] + before.width[i] + 1 - position
+            before.next[i] = node
+            before.width[i] = position - positions[i]
+        for i in range(level, self._level):
+            if update[i].next[i] is not None:
+                update[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key) -> bool:
+        update, _ = self._find(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(self._level):
+            before = update[i]
+            if before.next[i] is node:
+                before.width[i] += node.width[i] - 1
+                before.next[i] = node.next[i]
+            elif before.next[i] is not None:
+                before.width[i] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+        return True
+
+    def count_less(self, key) -> int:
+        """Number of keys strictly smaller than key (= index of key when present)"""
+        _, positions = self._find(key)
+        return positions[0]
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """Keys at indexes start..stop-1"""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        node, position = self._head, 0
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and position + node.width[i] <= start + 1:
+                position += node.width[i]
+                node = node.next[i]
+        keys = []
+        while node is not None and len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """Active citizens ranked by points (ties share a rank, like SQL RANK())"""
+
+    def __init__(self):
+        self._ranking = RankedSkipList()
+        self._entries: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        # Updates that arrive while the seed query runs; replayed on top of it
+        self._pending: Optional[Dict[int, Dict[str, Any]]] = None
+        self.loaded = False
+        self.updates = 0
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> Tuple[int, int]:
+        return (-(entry['points'] or 0), entry['id'])
+
+    @staticmethod
+    def _eligible(user: Dict[str, Any]) -> bool:
+        return user.get('role', 'citizen') == 'citizen' and user.get('status', 'active') == 'active'
+
+    def _apply(self, user: Dict[str, Any]) -> None:
+        old = self._entries.pop(user['id'], None)
+        if old is not None:
+            self._ranking.remove(self._key(old))
+        if self._eligible(user):
+            entry = {field: user.get(field) for field in LEADERBOARD_FIELDS}
+            self._entries[entry['id']] = entry
+            self._ranking.insert(self._key(entry))
+
+    def update(self, user: Dict[str, Any]) -> None:
+        """Insert, move or drop one user from a fresh users row"""
+        with self._lock:
+            if self._pending is not None:
+                self._pending[user['id']] = user
+            self._apply(user)
+            self.updates += 1
+
+    def replace(self, users: List[Dict[str, Any]]) -> None:
+        """Rebuild from a full list of users rows"""
+        with self._lock:
+            pending = self._pending or {}
+            self._entries = {
+                user['id']: {field: user.get(field) for field in LEADERBOARD_FIELDS}
+                for user in users if self._eligible(user)
+            }
+            self._ranking = RankedSkipList.from_sorted(sorted(map(self._key, self._entries.values())))
+            # Rows are absolute values, so replaying an update the seed already saw is harmless
+            for user in pending.values():
+                self._apply(user)
+            self._pending = None
+            self.loaded = True
+
+    async def load(self) -> None:
+        """Seed from the users table"""
+        with self._lock:
+            self._pending = {}
+        try:
+            users = await async_db.execute_query(SEED_QUERY, fetch=True)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        # Sorting and building take a while for large user tables; keep them off the event loop
+        await anyio.to_thread.run_sync(self.replace, users or [])
+
+    async def ensure_loaded(self) -> None:
+        if not self.loaded:
+            await self.load()
+
+    def _ranked(self, keys: List[Tuple[int, int]], first_index: int) -> List[Dict[str, Any]]:
+        entries = []
+        rank = previous_points = None
+        for offset, key in enumerate(keys):
+            points = -key[0]
+            if points != previous_points:
+                # Competition ranking: 1 + how many users have strictly more points
+                rank = first_index + offset + 1 if offset else self._ranking.count_less((key[0], 0)) + 1
+                previous_points = points
+            entries.append({**self._entries[key[1]], "rank": rank})
+        return entries
+
+    def top(self, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._ranked(self._ranking.slice(0, limit), 0)
+
+    def rank_of(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            return self._ranked([self._key(entry)], self._ranking.count_less(self._key(entry)))[0]
+
+    def around(self, user_id: int, radius: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """The user plus up to radius users ranked directly above and below"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            index = self._ranking.count_less(self._key(entry))
+            start = max(index - radius, 0)
+            return self._ranked(self._ranking.slice(start, index + radius + 1), start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"loaded": self.loaded, "users": len(self._ranking), "updates": self.updates}
+
+
+leaderboard = Leaderboard()
+
+
+# ===== TIME-WINDOWED / CITY LEADERBOARDS =====
+
+PERIODS = ("week", "month", "all")
+ALL_CITIES = ""  # city scope of the rollup rows that count every city
+ALL_TIME_START = date(1970, 1, 1)
+
+
+def period_start(period: str, day: date) -> date:
+    """First day of the bucket containing day (weeks start on Monday)"""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _record_award(cursor, user_id: int, points: int, reason: str, report_id: Optional[int], city: Optional[str]) -> None:
+    awarded_at = datetime.now()
+    cursor.execute(
+        """INSERT INTO points_ledger (user_id, points, reason, report_id, city, created_at)
+           VALUES (%s, %s, %s, %s, %s, %s)""",
+        (user_id, points, reason, report_id, city, awarded_at)
+    )
+    scopes = [ALL_CITIES] + ([city] if city else [])
+    rows = [
+        (period, period_start(period, awarded_at.date()), scope, user_id, points)
+        for period in PERIODS for scope in scopes
+    ]
+    # Sorted so concurrent awards lock rollup rows in the same order
+    rows.sort()
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))
+    cursor.execute(
+        f"""INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+            VALUES {placeholders}
+            ON DUPLICATE KEY UPDATE points = points + VALUES(points)""",
+        [value for row in rows for value in row]
+    )
+
+
+WINDOWED_QUERY = """
+    SELECT
+        u.id, u.name, u.email, u.badge, u.reports_submitted, u.created_at,
+        r.points,
+        RANK() OVER (ORDER BY r.points DESC) AS `rank`
+    FROM points_rollups r
+    JOIN users u ON u.id = r.user_id
+    WHERE r.period_type = %s AND r.period_start = %s AND r.city = %s
+      AND u.role = 'citizen' AND u.status = 'active'
+    ORDER BY r.points DESC, u.id
+    LIMIT %s
+"""
+
+
+async def windowed_leaderboard(period: str, city: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """Top citizens for the current week/month (or all time) in one city or everywhere"""
+    start = period_start(period, date.today())
+    params = (period, start, city or ALL_CITIES, limit)
+    return await async_db.execute_query(WINDOWED_QUERY, params, fetch=True)
+
+
+def award_points(
+    cursor,
+    user_id: int,
+    points: int,
+    reason: str = "manual",
+    report_id: Optional[int] = None,
+    city: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Add points (and re-derive the badge) on a transaction cursor
+    The award is also written to the points ledger and the week/month/all-time rollups
+    Returns the updated users row; the leaderboard follows once the transaction commits
+    """
+    cursor.execute(
+        f"UPDATE users SET points = points + %s, badge = {BADGE_SQL} WHERE id = %s",
+        (points, points, points, points, points, user_id)
+    )
+    if cursor.rowcount and points:
+        _record_award(cursor, user_id, points, reason, report_id, city)
+    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+    user = cursor.fetchone()
+    if user:
+        db.after_commit(lambda: leaderboard.update(user))
+    return user
@@ -0,0 +1,170 @@
+"""
+Micro-batching scheduler for CPU inference
+Concurrent submissions are grouped into one batch, cut when it reaches
+max_batch_size or max_wait_ms after its first item, and each batch runs as a
+single call on an executor (process or thread pool). A bounded number of
+outstanding items gives backpressure: submit() fails fast with QueueFullError
+instead of letting latency grow without limit.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised when too many items are already waiting for a batch"""
+
+
+class MicroBatcher:
+    """Collects single items into batches for a batch-processing function"""
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 20,
+        max_queue: int = 64,
+        max_concurrent_batches: int = 1,
+        executor: Optional[Executor] = None,
+        throughput_window: float = 60,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.max_concurrent_batches = max_concurrent_batches
+        self.executor = executor
+        self.throughput_window = throughput_window
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._running = set()
+        self._outstanding = 0
+
+        # Metrics
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self._latencies = deque(maxlen=1000)   # seconds per batch run
+        self._queue_waits = deque(maxlen=1000)  # seconds from submit to batch start
+        self._completed = deque()               # (finished_at, batch size) within throughput_window
+
+    def start(self) -> None:
+        # Queue, semaphore and task are created here so they belong to the running loop
+        if self._collector is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, *self._running, return_exceptions=True)
+            self._collector = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the batch it lands in"""
+        self.start()
+        if self._outstanding >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self._outstanding} items already queued")
+        future = asyncio.get_running_loop().create_future()
+        self._outstanding += 1
+        self.submitted += 1
+        await self._queue.put((item, future, time.perf_counter()))
+        try:
+            return await future
+        finally:
+            self._outstanding -= 1
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Waits here while every worker is busy; new items keep queueing meanwhile
+            await self._slots.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        # Skip items whose callers already gave up (client disconnected)
+        batch = [entry for entry in batch if not entry[1].done()]
+        started = time.perf_counter()
+        try:
+            if not batch:
+                return
+            for _, _, submitted_at in batch:
+                self._queue_waits.append(started - submitted_at)
+            loop = asyncio.get_running_loop()
+            items = [item for item, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, items)
+            except Exception as e:
+                self.failed_batches += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            finished = time.perf_counter()
+            self.batches += 1
+            self.items += len(batch)
+            self._latencies.append(finished - started)
+            self._completed.append((finished, len(batch)))
+            self._trim_completed(finished)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _percentile(values, fraction: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def _trim_completed(self, now: float) -> None:
+        # Trimmed as batches finish so the deque stays bounded even if stats() is never read
+        while self._completed and self._completed[0][0] < now - self.throughput_window:
+            self._completed.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim_completed(time.perf_counter())
+        recent = sum(size for _, size in self._completed)
+        latencies, waits = list(self._latencies), list(self._queue_waits)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue,
+            "queue_depth": self._outstanding,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_latency_ms": {
+                "p50": round(self._percentile(latencies, 0.5) * 1000, 1),
+                "p95": round(self._percentile(latencies, 0.95) * 1000, 1),
+                "max": round(max(latencies, default=0.0) * 1000, 1),
+            },
+            "queue_wait_ms_p95": round(self._percentile(waits, 0.95) * 1000, 1),
+            "throughput_per_s": round(recent / self.throughput_window, 2),
+        }
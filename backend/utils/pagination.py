@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination and field projection for list endpoints
+Pages are addressed by the sort key of the last row returned instead of OFFSET,
+so every page is an index range scan no matter how deep the client pages
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Listings that existed before pagination return every row when the client sends
+# neither ?limit= nor ?cursor=, so callers that don't follow X-Next-Cursor keep working
+UNBOUNDED = None
+
+# Clients pass this header's value back as ?cursor= to fetch the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Whitelisted columns for ?fields= projection (name -> SQL column)
+REPORT_FIELDS: Dict[str, str] = {name: name for name in (
+    "id", "user_id", "category", "description", "location_text", "city", "state", "country",
+    "latitude", "longitude", "image_url", "video_url", "status", "assigned_worker_id",
+    "department_id", "suggested_department_id", "admin_approved", "approved_by", "approved_at",
+    "priority", "admin_notes", "department_notes", "worker_notes", "points", "bonus_points",
+    "created_at", "updated_at", "completed_at",
+)}
+
+DONATION_FIELDS: Dict[str, str] = {name: name for name in (
+    "id", "user_id", "title", "description", "category", "condition", "image_url", "status",
+    "claimed_by", "location_text", "city", "state", "country", "created_at", "updated_at",
+    "claimed_at", "completed_at",
+)}
+
+# Sort orders shared by the listing endpoints
+NEWEST_FIRST = [("created_at", "DESC"), ("id", "DESC")]
+
+PRIORITY_RANK = {"urgent": 1, "high": 2, "medium": 3}
+PRIORITY_RANK_SQL = "CASE {col} WHEN 'urgent' THEN 1 WHEN 'high' THEN 2 WHEN 'medium' THEN 3 ELSE 4 END"
+
+
+def prefixed(fields: Dict[str, str], alias: str) -> Dict[str, str]:
+    """Qualify every column of a field whitelist with a table alias"""
+    return {name: f"{alias}.{column}" for name, column in fields.items()}
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """Decode a cursor produced by encode_cursor, rejecting tampered values"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_condition(sort_keys: Sequence[Tuple[str, str]], values: Sequence) -> Tuple[str, List]:
+    """
+    Build a WHERE fragment selecting rows strictly after `values` in `sort_keys` order
+
+    Uniform directions use a row comparison, which MySQL turns into a single range scan;
+    mixed directions expand to (a > x) OR (a = x AND b < y) ...
+    """
+    directions = {direction for _, direction in sort_keys}
+    if len(directions) == 1:
+        op = "<" if directions.pop() == "DESC" else ">"
+        columns = ", ".join(expr for expr, _ in sort_keys)
+        placeholders = ", ".join(["%s"] * len(sort_keys))
+        return f"({columns}) {op} ({placeholders})", list(values)
+
+    clauses, params = [], []
+    for i, (expr, direction) in enumerate(sort_keys):
+        parts = [f"{prev} = %s" for prev, _ in sort_keys[:i]]
+        parts.append(f"{expr} {'<' if direction == 'DESC' else '>'} %s")
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def order_by(sort_keys: Sequence[Tuple[str, str]]) -> str:
+    return ", ".join(f"{expr} {direction}" for expr, direction in sort_keys)
+
+
+def select_fields(fields: Optional[str], allowed: Dict[str, str], required: Sequence[str] = ("id", "created_at")) -> Optional[str]:
+    """
+    Turn a comma-separated ?fields= value into a SELECT list
+    Columns needed to build the next cursor are always included
+    Returns None when no projection was requested
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    for name in required:
+        if name not in names:
+            names.append(name)
+    return ", ".join(f"{_quote(allowed[name])} AS `{name}`" for name in names)
+
+
+def _quote(column: str) -> str:
+    # Backtick the column part so reserved words such as `condition` stay valid
+    alias, _, name = column.rpartition(".")
+    return f"{alias}.`{name}`" if alias else f"`{name}`"
+
+
+def page_size(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """Requested page size; UNBOUNDED when neither ?limit= nor ?cursor= was sent"""
+    if limit is None and cursor:
+        return DEFAULT_PAGE_SIZE
+    return limit
+
+
+def limit_clause(limit: Optional[int], params: List) -> str:
+    """' LIMIT %s' fetching one extra row to detect a next page ('' when unbounded)"""
+    if limit is UNBOUNDED:
+        return ""
+    params.append(limit + 1)
+    return " LIMIT %s"
+
+
+def paginate(rows: List[Dict], limit: Optional[int], key: Callable[[Dict], Sequence]) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Trim a limit + 1 fetch down to one page and build the cursor for the next one
+    Returns (rows, next_cursor); next_cursor is None on the last page
+    """
+    if limit is UNBOUNDED or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def projected_response(rows: List[Dict], cursor: Optional[str]) -> JSONResponse:
+    """Return projected rows directly, bypassing the full response model"""
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+    return JSONResponse(jsonable_encoder(rows), headers=headers)
@@ -0,0 +1,179 @@
+"""
+Static file serving for /uploads tuned for browser and CDN caches
+- Content-addressed files (uploads/ab/cd/<sha256>...) never change, so they get
+  a strong ETag from their name and Cache-Control: immutable
+- If-None-Match / If-Modified-Since are answered with 304 Not Modified
+- Single byte ranges (video scrubbing, resumed downloads) get 206 Partial Content
+- The body goes through the ASGI zero-copy extension (os.sendfile) when the
+  server offers it, otherwise it is read in large chunks off the event loop
+"""
+import os
+import re
+from email.utils import formatdate, parsedate
+from hashlib import md5
+from typing import Optional, Tuple
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Content-addressed originals and their derivatives can be cached forever
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Older timestamp-named uploads are revalidated with their ETag after a day
+DEFAULT_CACHE = "public, max-age=86400"
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+_CONTENT_ADDRESSED_RE = re.compile(r"^([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})(?:\.[A-Za-z0-9.]+)?$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def is_content_addressed(relative_path: str) -> bool:
+    match = _CONTENT_ADDRESSED_RE.match(relative_path)
+    return bool(match) and match.group(3).startswith(match.group(1) + match.group(2))
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match list against our ETag"""
+    if header.strip() == "*":
+        return True
+    ours = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == ours for tag in header.split(","))
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" range into inclusive offsets
+    Returns None when the header should be ignored (malformed or multiple ranges)
+    and raises ValueError when the range cannot be satisfied
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    first, last = match.group(1), match.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(size - length, 0), size - 1
+    if start >= size:
+        raise ValueError("Range starts past the end of the file")
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse that sends only bytes start..end and can use zero-copy sendfile"""
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path, stat_result: os.stat_result, start: int = 0, end: Optional[int] = None, **kwargs):
+        self.start = start
+        self.end = stat_result.st_size - 1 if end is None else end
+        super().__init__(path, stat_result=stat_result, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        count = self.end - self.start + 1
+        if self.send_header_only or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with await anyio.to_thread.run_sync(open, self.path, "rb") as file:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    # File shrank underneath us; close the response cleanly
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+class UploadFiles(StaticFiles):
+    """StaticFiles with strong ETags, immutable caching and byte-range support"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        relative_path = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+
+        if is_content_addressed(relative_path):
+            etag = f'"{os.path.basename(full_path)}"'
+            cache_control = IMMUTABLE_CACHE
+        else:
+            fingerprint = f"{stat_result.st_mtime}-{stat_result.st_size}".encode()
+            etag = f'"{md5(fingerprint, usedforsecurity=False).hexdigest()}"'
+            cache_control = DEFAULT_CACHE
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "etag": etag,
+            "last-modified": last_modified,
+            "cache-control": cache_control,
+            "accept-ranges": "bytes",
+        }
+
+        if self._not_modified(request_headers, etag, stat_result):
+            return NotModifiedResponse(Headers(headers))
+
+        size = stat_result.st_size
+        byte_range = None
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+        if byte_range is None:
+            headers["content-length"] = str(size)
+            return RangeFileResponse(
+                full_path, stat_result, status_code=status_code, headers=headers, method=scope["method"]
+            )
+
+        start, end = byte_range
+        headers["content-length"] = str(end - start + 1)
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        return RangeFileResponse(
+            full_path, stat_result, start, end, status_code=206, headers=headers, method=scope["method"]
+        )
+
+    def _not_modified(self, request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        # If-None-Match takes precedence; If-Modified-Since only applies without it
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            since = parsedate(if_modified_since)
+            modified = parsedate(formatdate(stat_result.st_mtime, usegmt=True))
+            return since is not None and since >= modified
+        return False
+
+    def _if_range_matches(self, request_headers: Headers, etag: str, last_modified: str) -> bool:
+        """A Range is honoured only if If-Range (when sent) still names this version"""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"'):
+            return if_range == etag
+        return if_range == last_modified
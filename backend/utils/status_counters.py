@@ -0,0 +1,102 @@
+"""
+Maintained per-status counts for reports and workers (status_counters table)
+Every status change goes through record_transition() inside the same
+transaction as the change itself, so the counts the admin dashboard reads
+are always consistent with the rows and cost a single tiny lookup to read.
+"""
+from typing import Callable, Dict, List, Optional
+from database import db
+
+REPORT = "report"
+WORKER = "worker"
+
+# Per-status counts straight from the source rows (same as the schema_v5 backfill)
+RECOUNT_QUERIES = {
+    REPORT: "SELECT status, COUNT(*) AS total FROM reports GROUP BY status",
+    WORKER: """SELECT worker_status AS status, COUNT(*) AS total FROM users
+               WHERE role = 'worker' AND worker_status IS NOT NULL GROUP BY worker_status""",
+}
+
+_listeners: List[Callable[[str, Optional[str], Optional[str]], None]] = []
+
+
+def on_transition(listener: Callable[[str, Optional[str], Optional[str]], None]) -> None:
+    """Call listener(entity, old_status, new_status) after each committed transition"""
+    _listeners.append(listener)
+
+
+def record_transition(cursor, entity: str, old_status: Optional[str], new_status: Optional[str]) -> None:
+    """
+    Move one item between status counts (run on a transaction cursor)
+    old_status None means the item was just created, new_status None that it was deleted
+    Deltas are applied as they are; a count that goes negative means a transition was
+    missed or recorded twice, so it is logged and the entity is recounted from its rows
+    """
+    if old_status == new_status:
+        return
+    for listener in _listeners:
+        db.after_commit(lambda listener=listener: listener(entity, old_status, new_status))
+    changes = []
+    if old_status is not None:
+        changes.append((old_status, -1))
+    if new_status is not None:
+        changes.append((new_status, 1))
+    # Fixed lock order so two opposite transitions can't deadlock on the counter rows
+    for status, delta in sorted(changes):
+        cursor.execute(
+            """INSERT INTO status_counters (entity, status, total) VALUES (%s, %s, %s)
+               ON DUPLICATE KEY UPDATE total = total + %s""",
+            (entity, status, delta, delta)
+        )
+    cursor.execute(
+        f"""SELECT status, total FROM status_counters
+            WHERE entity = %s AND status IN ({", ".join(["%s"] * len(changes))}) AND total < 0""",
+        (entity, *[status for status, _ in changes])
+    )
+    negative = cursor.fetchall()
+    if negative:
+        print(f"status_counters drifted for {entity} ({old_status} -> {new_status}): {negative}; recounting")
+        reconcile(cursor, entity)
+
+
+def reconcile(cursor, entity: str) -> Dict[str, int]:
+    """Reset an entity's counters to the counts of its rows; returns the new counts"""
+    cursor.execute(RECOUNT_QUERIES[entity])
+    counts = {row['status']: row['total'] for row in cursor.fetchall()}
+    cursor.execute("UPDATE status_counters SET total = 0 WHERE entity = %s", (entity,))
+    if counts:
+        cursor.execute(
+            f"""INSERT INTO status_counters (entity, status, total)
+                VALUES {", ".join(["(%s, %s, %s)"] * len(counts))}
+                ON DUPLICATE KEY UPDATE total = VALUES(total)""",
+            [value for status, total in sorted(counts.items()) for value in (entity, status, total)]
+        )
+    return counts
+
+
+def set_worker_status(cursor, worker_id: int, new_status: str) -> Optional[str]:
+    """
+    Change a worker's availability and its counters together
+    Returns the previous status, or None when the user isn't a worker
+    """
+    cursor.execute(
+        "SELECT worker_status FROM users WHERE id = %s AND role = 'worker' FOR UPDATE",
+        (worker_id,)
+    )
+    worker = cursor.fetchone()
+    if not worker:
+        return None
+    cursor.execute("UPDATE users SET worker_status = %s WHERE id = %s", (new_status, worker_id))
+    record_transition(cursor, WORKER, worker['worker_status'], new_status)
+    return worker['worker_status']
+
+
+COUNTERS_QUERY = "SELECT entity, status, total FROM status_counters"
+
+
+def group_counters(rows) -> Dict[str, Dict[str, int]]:
+    """COUNTERS_QUERY rows as {entity: {status: count}}"""
+    counters: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        counters.setdefault(row['entity'], {})[row['status']] = row['total']
+    return counters
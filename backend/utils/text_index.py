@@ -0,0 +1,118 @@
+"""
+In-memory inverted index with BM25 ranking
+Documents are tokenized once when the index is built; a query then only walks
+the postings of its own terms and keeps the best k with a heap, so search cost
+depends on how common the query terms are rather than on the corpus size
+"""
+import heapq
+import math
+import re
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+MIN_TOKEN_LENGTH = 3
+
+# Question filler that would otherwise match unrelated documents
+STOPWORDS = frozenset("""
+    about also and any are but can could does for from have how into its just like
+    not our should some than that the their them then there they this was what when
+    where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased alphanumeric words of at least MIN_TOKEN_LENGTH characters, minus stopwords"""
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOPWORDS
+    ]
+
+
+class InvertedIndex:
+    """
+    BM25 index over documents made of weighted text fields
+    Field weights scale term frequencies (a title match can count double, etc.)
+    Build with add()/add_counts() then finalize(), which packs the postings into
+    typed arrays (8 bytes per posting instead of a tuple object); the finalized
+    index is read-only and safe to share between concurrent searches
+    """
+
+    def __init__(self, field_weights: Mapping[str, float], k1: float = 1.2, b: float = 0.75):
+        self.field_weights = dict(field_weights)
+        self.k1 = k1
+        self.b = b
+        self._building: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_lengths = array("f")
+        self._idf: Dict[str, float] = {}
+        self._avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings or self._building)
+
+    def term_frequencies(self, fields: Mapping[str, str]) -> Dict[str, float]:
+        """Weighted term counts of one document"""
+        counts: Dict[str, float] = {}
+        for name, weight in self.field_weights.items():
+            for token, frequency in Counter(tokenize(fields.get(name) or "")).items():
+                counts[token] = counts.get(token, 0) + frequency * weight
+        return counts
+
+    def add(self, fields: Mapping[str, str]) -> int:
+        """Add a document and return its position; call finalize() after the last add"""
+        return self.add_counts(self.term_frequencies(fields))
+
+    def add_counts(self, counts: Mapping[str, float]) -> int:
+        doc_id = len(self._doc_lengths)
+        for token, frequency in counts.items():
+            self._building[token].append((doc_id, frequency))
+        self._doc_lengths.append(sum(counts.values()))
+        return doc_id
+
+    def finalize(self) -> "InvertedIndex":
+        """Precompute IDF and average length and pack the postings once all documents are added"""
+        total = len(self._doc_lengths)
+        self._avg_length = sum(self._doc_lengths) / total if total else 0.0
+        for token, postings in self._building.items():
+            doc_ids, frequencies = zip(*postings)
+            self._postings[token] = (array("I", doc_ids), array("f", frequencies))
+            self._idf[token] = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+        self._building = defaultdict(list)
+        return self
+
+    @classmethod
+    def build(cls, documents: Iterable[Mapping[str, str]], field_weights: Mapping[str, float], **params) -> "InvertedIndex":
+        index = cls(field_weights, **params)
+        for fields in documents:
+            index.add(fields)
+        return index.finalize()
+
+    def search(self, query: str, k: int = 10, tokens: Optional[Sequence[str]] = None) -> List[Tuple[int, float]]:
+        """
+        Top k (doc position, score) pairs for a query, best first
+        Ties keep document order so results are stable
+        """
+        terms = set(tokens if tokens is not None else tokenize(query))
+        if not terms or not self._doc_lengths:
+            return []
+
+        k1, b, avg_length = self.k1, self.b, self._avg_length or 1.0
+        doc_lengths = self._doc_lengths
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            idf = self._idf[term]
+            for doc_id, frequency in zip(*postings):
+                norm = k1 * (1 - b + b * doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * frequency * (k1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(doc_id, round(score, 6)) for doc_id, score in best]
@@ -0,0 +1,149 @@
+"""
+Streaming multipart upload handling
+The request body is parsed chunk by chunk and file data goes straight to a
+temporary file, so memory use stays at one chunk however large the upload is,
+and the size limit is enforced before the whole body has been received
+"""
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+import anyio
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request
+
+
+@dataclass
+class StreamedFile:
+    filename: str
+    content_type: Optional[str]
+    temp_path: str
+    size: int
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+class _FileFieldCollector:
+    """MultipartParser callbacks that keep only the data of one file field"""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.pending: List[bytes] = []
+        self.found = False
+        self._capturing = False
+        self._headers = {}
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        self._capturing = not self.found and name == self.field_name and b"filename" in options
+        if self._capturing:
+            self.found = True
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+            content_type = self._headers.get(b"content-type")
+            self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._capturing:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self) -> None:
+        self._capturing = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+
+async def stream_file_field(
+    request: Request,
+    field_name: str,
+    dest_dir: Path,
+    max_size: int,
+    on_chunk: Optional[Callable[[bytes], None]] = None
+) -> StreamedFile:
+    """
+    Stream one file field of a multipart request into a temp file inside dest_dir
+    The temp file lives next to its final location so callers can os.replace() it
+    atomically. Raises HTTPException 413 as soon as max_size is exceeded.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data upload")
+
+    collector = _FileFieldCollector(field_name)
+    parser = multipart.MultipartParser(params[b"boundary"], collector.callbacks())
+
+    fd, temp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-", suffix=".part")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async def flush():
+                nonlocal size
+                if not collector.pending:
+                    return
+                data = b"".join(collector.pending)
+                collector.pending.clear()
+                size += len(data)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large (max {max_size // (1024 * 1024)}MB)"
+                    )
+                if on_chunk is not None:
+                    on_chunk(data)
+                # Disk writes run on a worker thread so the event loop keeps serving
+                await anyio.to_thread.run_sync(out.write, data)
+
+            async for chunk in request.stream():
+                parser.write(chunk)
+                await flush()
+            parser.finalize()
+            await flush()
+
+        if not collector.found:
+            raise HTTPException(status_code=400, detail=f"No '{field_name}' file provided")
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return StreamedFile(
+        filename=collector.filename or "",
+        content_type=collector.content_type,
+        temp_path=temp_path,
+        size=size,
+    )
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+CitizenApp geohash backfill
+Fills reports.geohash for rows created before schema_v3.sql, using the same
+encoder the backend uses on insert (backend/utils/geohash.py). Runs in small
+batches walking the primary key, so it is safe on a live table and can be
+re-run at any time.
+
+Usage (from the database folder, same DB_* variables as the backend):
+    python backfill_geohash.py [--batch-size 1000]
+"""
+
+import argparse
+import os
+import sys
+
+import mysql.connector
+from mysql.connector import Error
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from utils.geohash import encode, MAX_PRECISION  # noqa: E402
+
+
+def connect():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "citizen_app_db"),
+        port=int(os.getenv("DB_PORT", 3306)),
+    )
+
+
+def backfill(connection, batch_size):
+    cursor = connection.cursor()
+    last_id = 0
+    updated = 0
+    while True:
+        cursor.execute(
+            """SELECT id, latitude, longitude FROM reports
+               WHERE id > %s AND geohash IS NULL
+                 AND latitude IS NOT NULL AND longitude IS NOT NULL
+               ORDER BY id LIMIT %s""",
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        cursor.executemany(
+            "UPDATE reports SET geohash = %s WHERE id = %s AND geohash IS NULL",
+            [(encode(float(lat), float(lon), MAX_PRECISION), report_id) for report_id, lat, lon in rows]
+        )
+        connection.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
+        print(f"✓ {updated} reports updated (up to id {last_id})")
+    cursor.close()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill reports.geohash for existing rows")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows updated per transaction")
+    args = parser.parse_args()
+
+    try:
+        connection = connect()
+    except Error as e:
+        print(f"❌ Connection Error: {e}")
+        sys.exit(1)
+
+    try:
+        total = backfill(connection, args.batch_size)
+        print(f"📊 Backfill complete: {total} reports")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
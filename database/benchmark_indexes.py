@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+CitizenApp index benchmark
+Prints the EXPLAIN plan and median run time of the hot report / worker queries
+as they ran before schema_v7.sql ("before") and after it ("after").
+
+How "before" is measured once v7 is applied: schema_v7.sql drops the
+single-column indexes its composites replace, so ignoring the composites
+alone would leave no index at all and overstate the gain. The benchmark
+therefore temporarily re-creates the dropped pre-v7 indexes, runs the
+queries with IGNORE INDEX on the v7 composites, and drops the re-created
+indexes again afterwards. That is the pre-migration index set. Re-creating
+indexes locks and rebuilds the tables, so run this on a copy of the data,
+not on the live database. Without v7 applied, the current plans are the
+"before" plans; run again after the migration for the "after" side.
+
+Usage (from the database folder, same DB_* variables as the backend):
+    python benchmark_indexes.py                 # compare plans on the current data
+    python benchmark_indexes.py --seed 200000   # add synthetic reports first
+    python benchmark_indexes.py --cleanup       # remove the synthetic rows
+
+Plans on a nearly empty table say little, so seed or use a copy of production
+data.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import mysql.connector
+from mysql.connector import Error
+
+V7_INDEXES = {
+    "reports": [
+        "idx_status_created", "idx_category_created", "idx_city_status_created",
+        "idx_department_status", "idx_worker_status", "idx_user_created",
+    ],
+    "users": ["idx_role_worker_status", "idx_role_department", "idx_role_status_points"],
+}
+
+# Indexes schema_v7.sql drops (name -> column), re-created for the "before" run
+PRE_V7_INDEXES = {
+    "reports": {
+        "idx_status": "status", "idx_category": "category", "idx_city": "city",
+        "idx_worker_id": "assigned_worker_id", "idx_user_id": "user_id",
+    },
+    "users": {"idx_role": "role"},
+}
+
+BENCH_EMAIL = "index-benchmark@example.invalid"
+STATUSES = ["pending", "approved", "assigned", "in-progress", "completed", "rejected"]
+CATEGORIES = ["pothole", "garbage", "streetlight", "water", "drainage", "other"]
+CITIES = ["Pune", "Mumbai", "Nagpur", "Nashik", "Aurangabad", "Solapur"]
+
+# (name, sql, params) - {reports} / {users} become the table plus an optional index hint
+HOT_QUERIES = [
+    ("pending reports, newest first",
+     "SELECT r.id FROM {reports} WHERE r.status = %s ORDER BY r.created_at DESC, r.id DESC LIMIT 51",
+     lambda s: ("pending",)),
+    ("reports by category, newest first",
+     "SELECT r.id FROM {reports} WHERE r.category = %s ORDER BY r.created_at DESC, r.id DESC LIMIT 51",
+     lambda s: (s["category"],)),
+    ("open reports in a city",
+     "SELECT r.id FROM {reports} WHERE r.city = %s AND r.status != 'done' ORDER BY r.created_at DESC",
+     lambda s: (s["city"],)),
+    ("department queue",
+     "SELECT r.id FROM {reports} WHERE r.department_id = %s AND r.status IN ('approved', 'assigned', 'in-progress')",
+     lambda s: (s["department_id"],)),
+    ("department stats",
+     "SELECT r.department_id, r.status, COUNT(*) FROM {reports} WHERE r.department_id IS NOT NULL GROUP BY r.department_id, r.status",
+     lambda s: ()),
+    ("worker tasks",
+     "SELECT r.id FROM {reports} WHERE r.assigned_worker_id = %s AND r.status IN ('assigned', 'in-progress')",
+     lambda s: (s["worker_id"],)),
+    ("worker stats",
+     "SELECT r.status, COUNT(*) FROM {reports} WHERE r.assigned_worker_id = %s GROUP BY r.status",
+     lambda s: (s["worker_id"],)),
+    ("citizen's reports",
+     "SELECT r.id FROM {reports} WHERE r.user_id = %s ORDER BY r.created_at DESC",
+     lambda s: (s["user_id"],)),
+    ("workers by availability",
+     "SELECT u.worker_status, COUNT(*) FROM {users} WHERE u.role = 'worker' GROUP BY u.worker_status",
+     lambda s: ()),
+    ("department workers",
+     "SELECT u.id FROM {users} WHERE u.role = 'worker' AND u.department_id = %s",
+     lambda s: (s["department_id"],)),
+]
+
+
+def connect():
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        database=os.getenv("DB_NAME", "citizen_app_db"),
+        port=int(os.getenv("DB_PORT", 3306)),
+    )
+
+
+def index_names(cursor):
+    cursor.execute(
+        """SELECT table_name, index_name FROM information_schema.statistics
+           WHERE table_schema = DATABASE() AND table_name IN ('reports', 'users')"""
+    )
+    return {(table.lower(), index) for table, index in cursor.fetchall()}
+
+
+def existing_indexes(cursor):
+    found = index_names(cursor)
+    return {table: [i for i in names if (table, i) in found] for table, names in V7_INDEXES.items()}
+
+
+def recreate_pre_v7_indexes(cursor):
+    """Add back the pre-v7 indexes that are missing; returns what was added"""
+    found = index_names(cursor)
+    added = []
+    for table, indexes in PRE_V7_INDEXES.items():
+        for name, column in indexes.items():
+            if (table, name) not in found:
+                print(f"ℹ️  Re-creating {table}.{name} for the before run")
+                cursor.execute(f"ALTER TABLE {table} ADD INDEX {name} ({column})")
+                added.append((table, name))
+    return added
+
+
+def drop_indexes(cursor, indexes):
+    for table, name in indexes:
+        cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+
+def table_refs(ignored):
+    refs = {}
+    for table, alias in (("reports", "r"), ("users", "u")):
+        hint = f" IGNORE INDEX ({', '.join(ignored[table])})" if ignored.get(table) else ""
+        refs[table] = f"{table} {alias}{hint}"
+    return refs
+
+
+def sample_values(cursor):
+    """Realistic filter values taken from the data itself"""
+    def first(query, default):
+        cursor.execute(query)
+        row = cursor.fetchone()
+        return row[0] if row and row[0] is not None else default
+
+    return {
+        "category": first("SELECT category FROM reports GROUP BY category ORDER BY COUNT(*) DESC LIMIT 1", "pothole"),
+        "city": first("SELECT city FROM reports WHERE city IS NOT NULL GROUP BY city ORDER BY COUNT(*) DESC LIMIT 1", "Pune"),
+        "department_id": first("SELECT department_id FROM reports WHERE department_id IS NOT NULL GROUP BY department_id ORDER BY COUNT(*) DESC LIMIT 1", 1),
+        "worker_id": first("SELECT assigned_worker_id FROM reports WHERE assigned_worker_id IS NOT NULL GROUP BY assigned_worker_id ORDER BY COUNT(*) DESC LIMIT 1", 0),
+        "user_id": first("SELECT user_id FROM reports GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1", 0),
+    }
+
+
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def time_query(cursor, sql, params, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def describe(plan):
+    return "; ".join(
+        f"type={row.get('type')} key={row.get('key') or '-'} rows={row.get('rows')}"
+        + (f" [{row['Extra']}]" if row.get("Extra") else "")
+        for row in plan
+    )
+
+
+def run_benchmark(connection, runs):
+    cursor = connection.cursor()
+    v7 = existing_indexes(cursor)
+    samples = sample_values(cursor)
+    cursor.execute("SELECT COUNT(*) FROM reports")
+    print(f"📊 reports: {cursor.fetchone()[0]} rows, samples: {samples}")
+
+    results = {}
+    if any(v7.values()):
+        added = recreate_pre_v7_indexes(cursor)
+        try:
+            results["before"] = measure(cursor, table_refs(v7), samples, runs)
+        finally:
+            drop_indexes(cursor, added)
+        results["after"] = measure(cursor, table_refs({}), samples, runs)
+    else:
+        print("ℹ️  schema_v7 indexes not found - these are the before plans; re-run after the migration")
+        results["before"] = measure(cursor, table_refs({}), samples, runs)
+    print("=" * 60)
+
+    for position, (name, _, _) in enumerate(HOT_QUERIES):
+        print(f"\n▶ {name}")
+        for label, measured in results.items():
+            elapsed, plan = measured[position]
+            print(f"  {label:<6} {elapsed:8.2f} ms  {describe(plan)}")
+    cursor.close()
+
+
+def measure(cursor, refs, samples, runs):
+    """(median ms, EXPLAIN rows) for every hot query"""
+    measured = []
+    for _, template, make_params in HOT_QUERIES:
+        params = make_params(samples)
+        sql = template.format(**refs)
+        plan = explain(cursor, sql, params)
+        measured.append((time_query(cursor, sql, params, runs), plan))
+    return measured
+
+
+def seed(connection, count):
+    cursor = connection.cursor()
+    cursor.execute("SELECT id FROM users WHERE email = %s", (BENCH_EMAIL,))
+    row = cursor.fetchone()
+    if row:
+        citizen_id = row[0]
+    else:
+        cursor.execute(
+            "INSERT INTO users (email, name, role) VALUES (%s, 'Index Benchmark', 'citizen')",
+            (BENCH_EMAIL,)
+        )
+        citizen_id = cursor.lastrowid
+    cursor.execute("SELECT id FROM departments")
+    departments = [r[0] for r in cursor.fetchall()] or [None]
+    cursor.execute("SELECT id FROM users WHERE role = 'worker'")
+    workers = [r[0] for r in cursor.fetchall()] or [None]
+
+    query = """INSERT INTO reports (user_id, category, description, location_text, city, status,
+               department_id, assigned_worker_id, created_at) VALUES (%s, %s, 'benchmark row',
+               'benchmark', %s, %s, %s, %s, NOW() - INTERVAL %s MINUTE)"""
+    batch = []
+    for i in range(count):
+        status = random.choice(STATUSES)
+        assigned = status in ("assigned", "in-progress", "completed")
+        batch.append((
+            citizen_id, random.choice(CATEGORIES), random.choice(CITIES), status,
+            random.choice(departments) if status != "pending" else None,
+            random.choice(workers) if assigned else None,
+            random.randint(0, 525600),
+        ))
+        if len(batch) == 5000 or i == count - 1:
+            cursor.executemany(query, batch)
+            connection.commit()
+            batch = []
+    cursor.execute("ANALYZE TABLE reports")
+    cursor.fetchall()
+    print(f"✓ Inserted {count} synthetic reports for {BENCH_EMAIL}")
+    print("ℹ️  status_counters now disagree with the table; --cleanup before using the admin dashboard")
+    cursor.close()
+
+
+def cleanup(connection):
+    cursor = connection.cursor()
+    # Reports cascade with their owner
+    cursor.execute("DELETE FROM users WHERE email = %s", (BENCH_EMAIL,))
+    connection.commit()
+    print(f"✓ Removed synthetic rows ({cursor.rowcount} user)")
+    cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query plans with and without the schema_v7 indexes")
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic reports first")
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic rows and exit")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per query (median is shown)")
+    args = parser.parse_args()
+
+    try:
+        connection = connect()
+    except Error as e:
+        print(f"❌ Connection Error: {e}")
+        sys.exit(1)
+
+    try:
+        if args.cleanup:
+            cleanup(connection)
+            return
+        if args.seed:
+            seed(connection, args.seed)
+        run_benchmark(connection, args.runs)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
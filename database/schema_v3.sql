@@ -0,0 +1,25 @@
+-- ============================================
+-- CitizenApp Database Schema V3
+-- Added: Geohash column for nearby / map viewport report searches
+-- Run after schema_v2.sql
+-- ============================================
+
+USE citizen_app_db;
+
+-- ============================================
+-- ALTER REPORTS TABLE - Add geohash location key
+-- ============================================
+-- Geohash prefixes are nested grid cells, so a radius or viewport search
+-- becomes a few B-tree range scans on idx_geohash instead of a full scan.
+-- The backend fills this column on insert (utils/geohash.py, precision 12).
+ALTER TABLE reports
+ADD COLUMN IF NOT EXISTS geohash CHAR(12) CHARACTER SET ascii COLLATE ascii_bin NULL AFTER longitude,
+ADD INDEX IF NOT EXISTS idx_geohash (geohash);
+
+-- Backfill existing reports from Python (MariaDB has no ST_GeoHash):
+--   python backfill_geohash.py
+-- Reports left with geohash = NULL never show up in /nearby or /within.
+
+-- ============================================
+-- END OF SCHEMA V3
+-- ============================================
@@ -0,0 +1,28 @@
+-- ============================================
+-- CitizenApp Database Schema V4
+-- Added: Content-addressed upload registry with reference counts
+-- Run after schema_v3.sql
+-- ============================================
+
+USE citizen_app_db;
+
+-- ============================================
+-- UPLOAD BLOBS TABLE
+-- ============================================
+-- One row per stored file, keyed by its SHA-256. Identical uploads share a row
+-- and a URL; ref_count tracks how many reports/donations point at the file.
+-- Blobs left at ref_count = 0 past the grace period are removed by
+-- POST /api/uploads/gc.
+CREATE TABLE IF NOT EXISTS upload_blobs (
+    sha256 CHAR(64) CHARACTER SET ascii COLLATE ascii_bin PRIMARY KEY,
+    url VARCHAR(500) NOT NULL,
+    size BIGINT NOT NULL,
+    ref_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_referenced_at TIMESTAMP NULL,
+    INDEX idx_orphans (ref_count, created_at)
+);
+
+-- ============================================
+-- END OF SCHEMA V4
+-- ============================================
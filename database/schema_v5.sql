@@ -0,0 +1,58 @@
+-- ============================================
+-- CitizenApp Database Schema V5
+-- Added: Maintained per-status counters for the admin dashboard
+-- Run after schema_v4.sql
+-- ============================================
+
+USE citizen_app_db;
+
+-- ============================================
+-- STATUS COUNTERS TABLE
+-- ============================================
+-- One row per (entity, status): how many reports / workers are currently in
+-- that status. The API adjusts these rows in the same transaction as every
+-- status change (utils/status_counters.py), so GET /api/admin/stats reads a
+-- handful of rows instead of scanning reports and users.
+CREATE TABLE IF NOT EXISTS status_counters (
+    entity VARCHAR(20) NOT NULL,
+    status VARCHAR(30) NOT NULL,
+    total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (entity, status)
+);
+
+-- ============================================
+-- BACKFILL FROM EXISTING ROWS
+-- ============================================
+-- Safe to re-run: counts are recomputed, not added
+INSERT INTO status_counters (entity, status, total)
+SELECT 'report', status, COUNT(*)
+FROM reports
+GROUP BY status
+ON DUPLICATE KEY UPDATE total = VALUES(total);
+
+INSERT INTO status_counters (entity, status, total)
+SELECT 'worker', worker_status, COUNT(*)
+FROM users
+WHERE role = 'worker' AND worker_status IS NOT NULL
+GROUP BY worker_status
+ON DUPLICATE KEY UPDATE total = VALUES(total);
+
+-- ============================================
+-- VIEWS
+-- ============================================
+
+-- View: Admin Statistics (now read from the counters instead of seven COUNT(*) scans)
+CREATE OR REPLACE VIEW admin_stats_view AS
+SELECT 
+    COALESCE(SUM(CASE WHEN entity = 'report' AND status = 'pending' THEN total END), 0) as pending_count,
+    COALESCE(SUM(CASE WHEN entity = 'report' AND status = 'approved' THEN total END), 0) as approved_count,
+    COALESCE(SUM(CASE WHEN entity = 'report' AND status IN ('assigned', 'in-progress') THEN total END), 0) as in_progress_count,
+    COALESCE(SUM(CASE WHEN entity = 'report' AND status IN ('completed', 'done') THEN total END), 0) as completed_count,
+    COALESCE(SUM(CASE WHEN entity = 'report' AND status = 'rejected' THEN total END), 0) as rejected_count,
+    COALESCE(SUM(CASE WHEN entity = 'worker' AND status = 'available' THEN total END), 0) as available_workers,
+    COALESCE(SUM(CASE WHEN entity = 'worker' AND status = 'busy' THEN total END), 0) as busy_workers
+FROM status_counters;
+
+-- ============================================
+-- END OF SCHEMA V5
+-- ============================================
@@ -0,0 +1,109 @@
+-- ============================================
+-- CitizenApp Database Schema V6
+-- Added: Points ledger and pre-aggregated weekly / monthly / city leaderboards
+-- Run after schema_v5.sql
+-- ============================================
+
+USE citizen_app_db;
+
+-- ============================================
+-- POINTS LEDGER TABLE
+-- ============================================
+-- One row per award (report completed, manual adjustment, ...). users.points
+-- stays the running total; the ledger keeps when and where points were earned.
+CREATE TABLE IF NOT EXISTS points_ledger (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    user_id INT NOT NULL,
+    points INT NOT NULL,
+    reason VARCHAR(50) NOT NULL DEFAULT 'manual',
+    report_id INT NULL,
+    city VARCHAR(100) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_user_time (user_id, created_at),
+    INDEX idx_created (created_at)
+);
+
+-- ============================================
+-- POINTS ROLLUPS TABLE
+-- ============================================
+-- Points per user per calendar bucket, incremented in the same transaction
+-- as each ledger row (utils/leaderboard.py). city = '' is the all-cities
+-- scope; period 'all' uses the fixed bucket 1970-01-01. idx_rank lets a
+-- city/week board be read straight off the index in points order.
+CREATE TABLE IF NOT EXISTS points_rollups (
+    period_type ENUM('week', 'month', 'all') NOT NULL,
+    period_start DATE NOT NULL,
+    city VARCHAR(100) NOT NULL DEFAULT '',
+    user_id INT NOT NULL,
+    points INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (period_type, period_start, city, user_id),
+    INDEX idx_rank (period_type, period_start, city, points DESC),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- ============================================
+-- BACKFILL FROM COMPLETED REPORTS
+-- ============================================
+-- Completed reports carry a timestamp and a city for their points.
+INSERT INTO points_ledger (user_id, points, reason, report_id, city, created_at)
+SELECT r.user_id, r.points + COALESCE(r.bonus_points, 0), 'report_completed', r.id, r.city, r.completed_at
+FROM reports r
+WHERE r.status IN ('completed', 'done')
+  AND r.completed_at IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM points_ledger l WHERE l.report_id = r.id);
+
+-- Every other point in users.points (manual adjustments, seed data) has no
+-- history: record the remainder as one 'historical' award with no city, dated
+-- when the user joined, so ledger totals match users.points and the all-time
+-- board reads the same totals with or without a city filter. Inserts only
+-- the difference, so re-running is safe.
+INSERT INTO points_ledger (user_id, points, reason, report_id, city, created_at)
+SELECT u.id, COALESCE(u.points, 0) - COALESCE(l.total, 0), 'historical', NULL, NULL, u.created_at
+FROM users u
+LEFT JOIN (SELECT user_id, SUM(points) AS total FROM points_ledger GROUP BY user_id) l ON l.user_id = u.id
+WHERE COALESCE(u.points, 0) != COALESCE(l.total, 0);
+
+-- Rebuilt from the ledger, so re-running is safe
+DELETE FROM points_rollups;
+
+INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+SELECT 'week', DATE(created_at) - INTERVAL WEEKDAY(created_at) DAY, '', user_id, SUM(points)
+FROM points_ledger GROUP BY 2, user_id;
+
+INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+SELECT 'month', DATE(created_at) - INTERVAL (DAYOFMONTH(created_at) - 1) DAY, '', user_id, SUM(points)
+FROM points_ledger GROUP BY 2, user_id;
+
+INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+SELECT 'all', '1970-01-01', '', user_id, SUM(points)
+FROM points_ledger GROUP BY user_id;
+
+INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+SELECT 'week', DATE(created_at) - INTERVAL WEEKDAY(created_at) DAY, city, user_id, SUM(points)
+FROM points_ledger WHERE city IS NOT NULL AND city != '' GROUP BY 2, city, user_id;
+
+INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+SELECT 'month', DATE(created_at) - INTERVAL (DAYOFMONTH(created_at) - 1) DAY, city, user_id, SUM(points)
+FROM points_ledger WHERE city IS NOT NULL AND city != '' GROUP BY 2, city, user_id;
+
+INSERT INTO points_rollups (period_type, period_start, city, user_id, points)
+SELECT 'all', '1970-01-01', city, user_id, SUM(points)
+FROM points_ledger WHERE city IS NOT NULL AND city != '' GROUP BY city, user_id;
+
+-- ============================================
+-- WINDOW EXPIRY
+-- ============================================
+-- Past buckets are never read again; drop them with a range delete on the
+-- primary key prefix. Requires SET GLOBAL event_scheduler = ON.
+CREATE EVENT IF NOT EXISTS purge_expired_points_rollups
+ON SCHEDULE EVERY 1 DAY
+DO
+    DELETE FROM points_rollups
+    WHERE (period_type = 'week' AND period_start < CURRENT_DATE - INTERVAL 12 WEEK)
+       OR (period_type = 'month' AND period_start < CURRENT_DATE - INTERVAL 24 MONTH);
+
+-- ============================================
+-- END OF SCHEMA V6
+-- ============================================
@@ -0,0 +1,59 @@
+-- ============================================
+-- CitizenApp Database Schema V7
+-- Added: Composite indexes for the hot report / worker access paths
+-- Run after schema_v6.sql
+-- Compare query plans with: python benchmark_indexes.py
+-- ============================================
+
+USE citizen_app_db;
+
+-- ============================================
+-- REPORTS
+-- ============================================
+-- Each index leads with the equality filter and ends with the sort column.
+-- InnoDB appends the primary key to every secondary index, so
+-- (status, created_at) also serves ORDER BY created_at DESC, id DESC and
+-- keyset pages walk the index with no filesort.
+--
+--   idx_status_created         GET /reports?status=, GET /admin/reports/pending,
+--                              GET /admin/reports?status=
+--   idx_category_created       GET /reports?category=
+--   idx_city_status_created    GET /reports/city/{city}
+--   idx_department_status      GET /admin/departments/{id}/reports, department stats
+--   idx_worker_status          GET /worker/{id}/tasks, GET /worker/{id}/stats
+--   idx_user_created           a citizen's own reports, points ledger backfill
+--
+-- The single-column indexes they replace are left-prefixes of the new ones,
+-- so dropping them loses no access path and saves a write per insert. The
+-- foreign keys on user_id / assigned_worker_id are served by the new indexes.
+-- IF [NOT] EXISTS (MariaDB) makes the file safe to re-run after a partial run.
+ALTER TABLE reports
+    ADD INDEX IF NOT EXISTS idx_status_created (status, created_at),
+    ADD INDEX IF NOT EXISTS idx_category_created (category, created_at),
+    ADD INDEX IF NOT EXISTS idx_city_status_created (city, status, created_at),
+    ADD INDEX IF NOT EXISTS idx_department_status (department_id, status, created_at),
+    ADD INDEX IF NOT EXISTS idx_worker_status (assigned_worker_id, status),
+    ADD INDEX IF NOT EXISTS idx_user_created (user_id, created_at),
+    DROP INDEX IF EXISTS idx_status,
+    DROP INDEX IF EXISTS idx_category,
+    DROP INDEX IF EXISTS idx_city,
+    DROP INDEX IF EXISTS idx_worker_id,
+    DROP INDEX IF EXISTS idx_user_id;
+
+-- ============================================
+-- USERS
+-- ============================================
+--   idx_role_worker_status     worker counts by availability (admin stats fallback)
+--   idx_role_department        GET /admin/departments/{id}/workers, department stats
+--   idx_role_status_points     leaderboard seed (active citizens by points)
+ALTER TABLE users
+    ADD INDEX IF NOT EXISTS idx_role_worker_status (role, worker_status),
+    ADD INDEX IF NOT EXISTS idx_role_department (role, department_id, worker_status),
+    ADD INDEX IF NOT EXISTS idx_role_status_points (role, status, points),
+    DROP INDEX IF EXISTS idx_role;
+
+ANALYZE TABLE reports, users;
+
+-- ============================================
+-- END OF SCHEMA V7
+-- ============================================